@@ -0,0 +1,10 @@
+"""Воспроизводимые замеры производительности слоя данных и обновления интерфейса.
+
+Запуск из корня проекта: python -m benchmarks --help
+"""
+import sys
+from pathlib import Path
+
+# Модули приложения импортируются так же, как в src/main.py
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,96 @@
+import os
+import sys
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.dataset import cached_dataset
+from benchmarks.harness import (BENCHMARKS, BenchContext, run_benchmark, load_baseline,
+                                save_baseline, compare, format_table)
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_CACHE_DIR = BENCH_DIR / ".cache"
+GROUPS = ("db", "search", "repo", "ui")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Замеры производительности на синтетических наборах задач"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000],
+                        help="размеры наборов данных (от 1000 до 1000000 задач)")
+    parser.add_argument("--seed", type=int, default=42, help="seed генератора данных")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, help="только указанные группы замеров")
+    parser.add_argument("--repeat", type=int, help="число повторов вместо заданного в замере")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="файл эталона")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="записать результаты как новый эталон")
+    parser.add_argument("--threshold", type=float, default=1.3,
+                        help="допустимый рост медианы относительно эталона (во сколько раз)")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help="каталог сгенерированных наборов данных")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(name)s - %(message)s")
+
+    # Регистрация замеров
+    from benchmarks import cases  # noqa: F401
+    selected = [bench for bench in BENCHMARKS if not args.only or bench.group in args.only]
+
+    settings_dir = tempfile.TemporaryDirectory()
+    if any(bench.group == "ui" for bench in selected):
+        from PyQt5.QtCore import QSettings
+        from PyQt5.QtWidgets import QApplication
+        # Настройки пользователя не читаются и не перезаписываются замерами
+        QSettings.setDefaultFormat(QSettings.IniFormat)
+        QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, settings_dir.name)
+        app = QApplication(sys.argv[:1])  # noqa: F841
+
+    baseline = load_baseline(args.baseline)
+    all_results = {}
+    regressions = []
+    for size in args.sizes:
+        print(f"\n== {size} задач ==", flush=True)
+        source = cached_dataset(args.cache_dir, size, args.seed)
+        with tempfile.TemporaryDirectory() as workdir:
+            # Рабочая копия: записывающие замеры не портят кэш наборов.
+            # MainWindow открывает tasks.db в текущем каталоге.
+            db_path = Path(workdir) / "tasks.db"
+            shutil.copyfile(source, db_path)
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            ctx = BenchContext(db_path, size, args.seed)
+            try:
+                results = [run_benchmark(bench, ctx, args.repeat) for bench in selected]
+            finally:
+                ctx.close()
+                os.chdir(cwd)
+
+        size_baseline = baseline.get("sizes", {}).get(str(size), {})
+        print(format_table(results, size_baseline))
+        regressions.extend(f"[{size}] {line}"
+                           for line in compare(results, size_baseline, args.threshold))
+        all_results[size] = results
+
+    settings_dir.cleanup()
+    if args.save_baseline:
+        save_baseline(args.baseline, all_results)
+        print(f"\nЭталон сохранен: {args.baseline}")
+    elif regressions:
+        print("\nЗамедления относительно эталона:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+from dataclasses import replace
+from datetime import date
+
+from benchmarks.dataset import WORDS
+from benchmarks.harness import benchmark, wait_until, BenchContext
+from models import Priority, Status, Task, utc_now
+from query import TaskQuery, TaskSort
+from repository import TaskRepository
+
+PAGE_SIZE = 200
+
+
+# --- Слой данных -----------------------------------------------------------
+
+@benchmark("db.get_all_tasks_summary", repeat=5)
+def get_all_tasks_summary(ctx: BenchContext):
+    ctx.db.get_all_tasks(summary=True)
+
+
+@benchmark("db.first_page")
+def first_page(ctx: BenchContext):
+    ctx.db.query_tasks_page(TaskQuery(), PAGE_SIZE, summary=True)
+
+
+@benchmark("db.filtered_page")
+def filtered_page(ctx: BenchContext):
+    query = TaskQuery(category_id=ctx.rng.randint(1, 4),
+                      statuses=frozenset({Status.PENDING}), sort=TaskSort.DUE_DATE)
+    ctx.db.query_tasks_page(query, PAGE_SIZE, summary=True)
+
+
+@benchmark("db.keyset_20_pages", repeat=10)
+def keyset_pages(ctx: BenchContext):
+    cursor = None
+    for _ in range(20):
+        _, cursor = ctx.db.query_tasks_page(TaskQuery(), PAGE_SIZE, cursor, summary=True)
+        if cursor is None:
+            break
+
+
+@benchmark("db.due_range_month")
+def due_range(ctx: BenchContext):
+    month = ctx.rng.randint(1, 6)
+    ctx.db.query_tasks(TaskQuery(due_from=date(2025, month, 1), due_to=date(2025, month, 28)),
+                       summary=True)
+
+
+@benchmark("db.get_task")
+def get_task(ctx: BenchContext):
+    ctx.db.get_task(ctx.random_task_id())
+
+
+@benchmark("db.statistics")
+def statistics(ctx: BenchContext):
+    ctx.db.get_statistics()
+
+
+def _new_task(index: int) -> Task:
+    return Task(id=None, title=f"Замер {index}", description="", priority=Priority.MEDIUM,
+                status=Status.PENDING, due_date=None, created_at=utc_now(), category_id=None)
+
+
+def _random_tasks(ctx: BenchContext, count: int):
+    tasks = map(ctx.db.get_task, (ctx.random_task_id() for _ in range(count)))
+    return [task for task in tasks if task is not None]
+
+
+# Записывающие замеры возвращают набор в исходное состояние после каждого повтора
+
+@benchmark("db.add_task")
+def add_task(ctx: BenchContext):
+    yield
+    task_id = ctx.db.add_task(_new_task(0))
+    yield
+    ctx.db.delete_task(task_id)
+
+
+@benchmark("db.update_task")
+def update_task(ctx: BenchContext):
+    tasks = _random_tasks(ctx, 1)
+    yield
+    for task in tasks:
+        ctx.db.update_task(replace(task, priority=Priority.HIGH))
+    yield
+    ctx.db.update_tasks(tasks)
+
+
+@benchmark("db.add_tasks_1000", repeat=5)
+def add_tasks(ctx: BenchContext):
+    yield
+    task_ids = ctx.db.add_tasks(_new_task(i) for i in range(1000))
+    yield
+    ctx.db.delete_tasks(task_ids)
+
+
+@benchmark("db.set_status_many_100", repeat=10)
+def set_status_many(ctx: BenchContext):
+    tasks = _random_tasks(ctx, 100)
+    yield
+    ctx.db.set_status_many([task.id for task in tasks], Status.COMPLETED)
+    yield
+    ctx.db.update_tasks(tasks)
+
+
+# --- Поиск -----------------------------------------------------------------
+
+@benchmark("search.page")
+def search_page(ctx: BenchContext):
+    ctx.db.query_tasks_page(TaskQuery(text=ctx.rng.choice(WORDS)), PAGE_SIZE, summary=True)
+
+
+@benchmark("search.two_words_filtered")
+def search_filtered(ctx: BenchContext):
+    text = f"{ctx.rng.choice(WORDS)} {ctx.rng.choice(WORDS)[:3]}"
+    ctx.db.query_tasks_page(TaskQuery(text=text, priorities=frozenset({Priority.HIGH})),
+                            PAGE_SIZE, summary=True)
+
+
+@benchmark("search.ranked")
+def search_ranked(ctx: BenchContext):
+    ctx.db.search_tasks(ctx.rng.choice(WORDS), limit=50, summary=True)
+
+
+# --- Кэш задач в памяти ----------------------------------------------------
+
+@benchmark("repo.load", repeat=3)
+def repository_load(ctx: BenchContext):
+    TaskRepository(ctx.db).load()
+
+
+@benchmark("repo.filtered_page")
+def repository_page(ctx: BenchContext):
+    query = TaskQuery(priorities=frozenset({ctx.rng.choice(list(Priority))}),
+                      statuses=frozenset({ctx.rng.choice(list(Status))}),
+                      sort=ctx.rng.choice(list(TaskSort)))
+    ctx.repository.query_tasks_page(query, PAGE_SIZE)
+
+
+# --- Интерфейс (платформа Qt offscreen) ------------------------------------
+
+def _close_window(window):
+    from PyQt5.QtWidgets import QApplication
+    window.close()
+    window.deleteLater()
+    QApplication.processEvents()
+
+
+@benchmark("ui.first_paint", repeat=5)
+def first_paint(ctx: BenchContext):
+    from PyQt5.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+    yield
+    window = MainWindow()
+    window.show()
+    QApplication.processEvents()
+    yield
+    _close_window(window)
+
+
+@benchmark("ui.startup", repeat=3)
+def startup(ctx: BenchContext):
+    """До показа первой страницы задач"""
+    from ui.main_window import MainWindow
+    yield
+    window = MainWindow()
+    window.show()
+    wait_until(lambda: window.db is not None)
+    yield
+    _close_window(window)
+
+
+@benchmark("ui.cache_warm_up", repeat=3)
+def cache_warm_up(ctx: BenchContext):
+    from ui.main_window import MainWindow
+    window = MainWindow()
+    window.show()
+    wait_until(lambda: window.db is not None)
+    yield
+    wait_until(lambda: window.cache_warm)
+    yield
+    _close_window(window)
+
+
+@benchmark("ui.load_tasks", repeat=10)
+def load_tasks(ctx: BenchContext):
+    ctx.window.load_tasks()
+
+
+@benchmark("ui.refresh_view")
+def refresh_view(ctx: BenchContext):
+    ctx.window.refresh_view()
+
+
+@benchmark("ui.filter_change")
+def filter_change(ctx: BenchContext):
+    combo = ctx.window.priority_filter
+    combo.setCurrentIndex((combo.currentIndex() + 1) % combo.count())
+
+
+@benchmark("ui.scroll_2000_rows", repeat=10)
+def scroll(ctx: BenchContext):
+    window = ctx.window
+    window.refresh_view()
+    model = window.task_model
+    while model.rowCount() < 2000 and model.canFetchMore():
+        model.fetchMore()
+
+
+@benchmark("ui.search_first_page")
+def search_first_page(ctx: BenchContext):
+    ctx.window.search_first_page(ctx.rng.choice(WORDS))
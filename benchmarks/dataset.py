@@ -0,0 +1,115 @@
+import random
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+from database import DatabaseManager
+from models import Task, Category, Priority, Status
+
+logger = logging.getLogger(__name__)
+
+# Опорная дата набора: данные не зависят от дня запуска
+REFERENCE_DATE = datetime(2025, 1, 1)
+
+EXTRA_CATEGORIES = ["Дом", "Учеба", "Здоровье", "Финансы", "Путешествия", "Проекты"]
+
+# Веса распределений по значениям перечислений
+PRIORITY_WEIGHTS = {Priority.LOW: 30, Priority.MEDIUM: 50, Priority.HIGH: 20}
+STATUS_WEIGHTS = {Status.PENDING: 45, Status.IN_PROGRESS: 15, Status.COMPLETED: 40}
+
+# Доля задач без категории, без описания и со сроком
+NO_CATEGORY_SHARE = 0.2
+NO_DESCRIPTION_SHARE = 0.3
+DUE_DATE_SHARE = 0.6
+
+WORDS = (
+    "отчет встреча проект клиент письмо звонок задача план бюджет анализ "
+    "документ договор презентация ремонт покупка магазин врач тренировка "
+    "книга курс экзамен лекция код релиз тест ошибка сервер база данные "
+    "report meeting review deploy invoice design draft backup release sprint "
+    "подготовить отправить проверить обсудить купить записаться оплатить "
+    "согласовать исправить обновить написать прочитать позвонить собрать"
+).split()
+
+INSERT_CHUNK_SIZE = 10_000
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _description(rng: random.Random) -> str:
+    if rng.random() < NO_DESCRIPTION_SHARE:
+        return ""
+    # Длина описаний с длинным хвостом: в основном короткие, изредка очень длинные
+    words = min(int(rng.lognormvariate(2.5, 1.0)) + 1, 400)
+    return _sentence(rng, words, words)
+
+
+def generate_tasks(count: int, category_ids: List[int], seed: int = 42) -> Iterator[Task]:
+    """Синтетические задачи; один и тот же seed дает один и тот же набор"""
+    rng = random.Random(seed)
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    # Категории используются неравномерно: первые заметно чаще
+    category_weights = [1 / (rank + 1) for rank in range(len(category_ids))]
+    for _ in range(count):
+        created_at = REFERENCE_DATE - timedelta(seconds=rng.randint(0, 2 * 365 * 24 * 3600))
+        due_date = None
+        if rng.random() < DUE_DATE_SHARE:
+            due_date = (REFERENCE_DATE + timedelta(days=rng.randint(-90, 180))).date()
+        category_id = None
+        if category_ids and rng.random() >= NO_CATEGORY_SHARE:
+            category_id = rng.choices(category_ids, category_weights)[0]
+        yield Task(
+            id=None,
+            title=_sentence(rng, 2, 6).capitalize(),
+            description=_description(rng),
+            priority=rng.choices(priorities, priority_weights)[0],
+            status=rng.choices(statuses, status_weights)[0],
+            due_date=due_date,
+            created_at=created_at,
+            category_id=category_id
+        )
+
+
+def build_dataset(path: Path, count: int, seed: int = 42) -> Path:
+    """Создание базы с count задачами (существующий файл перезаписывается)"""
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    db = DatabaseManager(str(path))
+    try:
+        existing = {category.name for category in db.get_categories()}
+        for name in EXTRA_CATEGORIES:
+            if name not in existing:
+                db.add_category(Category(id=None, name=name, color="#3498db", created_at=REFERENCE_DATE))
+        category_ids = [category.id for category in db.get_categories()]
+
+        chunk = []
+        for task in generate_tasks(count, category_ids, seed):
+            chunk.append(task)
+            if len(chunk) == INSERT_CHUNK_SIZE:
+                db.add_tasks(chunk)
+                chunk = []
+        if chunk:
+            db.add_tasks(chunk)
+        with db.transaction() as conn:
+            conn.execute("ANALYZE")
+    finally:
+        db.close()
+    logger.info(f"Набор данных {path}: {count} задач (seed={seed})")
+    return path
+
+
+def cached_dataset(cache_dir: Path, count: int, seed: int = 42) -> Path:
+    """Путь к набору данных в каталоге кэша; набор создается при первом обращении"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"tasks_{count}_{seed}.db"
+    if not path.exists():
+        # Прерванная генерация не должна оставить в кэше неполный набор
+        partial = build_dataset(cache_dir / f"{path.name}.partial", count, seed)
+        partial.rename(path)
+    return path
@@ -0,0 +1,205 @@
+import inspect
+import json
+import platform
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Замеры короче этого порога считаются шумом при сравнении с эталоном
+NOISE_FLOOR_MS = 1.0
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable
+    repeat: int
+    # Для группового запуска: db, search, repo, ui
+    group: str
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, repeat: int = 20):
+    """Регистрация замера.
+
+    Функция получает BenchContext. Функция-генератор делится двумя yield:
+    до первого — подготовка, между ними — замеряемый код, после второго — очистка.
+    """
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, repeat, name.split(".", 1)[0]))
+        return func
+    return decorator
+
+
+class BenchContext:
+    """Общее состояние замеров одного набора данных"""
+
+    def __init__(self, db_path: Path, size: int, seed: int):
+        self.db_path = db_path
+        self.size = size
+        self.rng = random.Random(seed)
+        self._db = None
+        self._repository = None
+        self._window = None
+        self._max_id: Optional[int] = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            from database import DatabaseManager
+            self._db = DatabaseManager(str(self.db_path))
+        return self._db
+
+    @property
+    def repository(self):
+        """Загруженный кэш задач (создается один раз)"""
+        if self._repository is None:
+            from repository import TaskRepository
+            self._repository = TaskRepository(self.db)
+            self._repository.load()
+        return self._repository
+
+    @property
+    def window(self):
+        """Главное окно поверх рабочей копии набора с заполненным кэшем (создается один раз)"""
+        if self._window is None:
+            from ui.main_window import MainWindow
+            self._window = MainWindow()
+            self._window.show()
+            window = self._window
+            wait_until(lambda: window.cache_warm)
+        return self._window
+
+    def random_task_id(self) -> int:
+        if self._max_id is None:
+            self._max_id = self.db._get_connection().execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+        return self.rng.randint(1, self._max_id)
+
+    def close(self):
+        if self._window is not None:
+            self._window.close()
+            self._window = None
+        self._repository = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 600.0):
+    """Обработка событий Qt, пока не выполнится условие (фоновая загрузка окна)"""
+    from PyQt5.QtCore import QEventLoop
+    from PyQt5.QtWidgets import QApplication
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("условие не выполнено за отведенное время")
+        QApplication.processEvents(QEventLoop.AllEvents, 10)
+
+
+def _run_once(func: Callable, ctx: BenchContext) -> float:
+    if not inspect.isgeneratorfunction(func):
+        start = time.perf_counter()
+        func(ctx)
+        return time.perf_counter() - start
+    steps = func(ctx)
+    next(steps)
+    start = time.perf_counter()
+    next(steps)
+    elapsed = time.perf_counter() - start
+    for _ in steps:
+        pass
+    return elapsed
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    samples_ms: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, float]:
+        samples = self.samples_ms
+        return {
+            "min": min(samples),
+            "p50": percentile(samples, 50),
+            "p90": percentile(samples, 90),
+            "p99": percentile(samples, 99),
+            "max": max(samples),
+        }
+
+
+def run_benchmark(bench: Benchmark, ctx: BenchContext, repeat: Optional[int] = None,
+                  warmup: int = 1) -> BenchResult:
+    """Прогрев и repeat повторов замера"""
+    for _ in range(warmup):
+        _run_once(bench.func, ctx)
+    result = BenchResult(bench.name)
+    for _ in range(repeat or bench.repeat):
+        result.samples_ms.append(_run_once(bench.func, ctx) * 1000)
+    return result
+
+
+def load_baseline(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: Dict[int, List[BenchResult]]):
+    """Сохранение медиан и p90 как эталона (существующие размеры наборов дополняются)"""
+    baseline = load_baseline(path)
+    baseline["environment"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+    }
+    sizes = baseline.setdefault("sizes", {})
+    for size, size_results in results.items():
+        sizes[str(size)] = {
+            result.name: {key: round(value, 3) for key, value in result.summary().items()
+                          if key in ("p50", "p90")}
+            for result in size_results
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: List[BenchResult], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Замеры, медиана которых выросла больше чем в threshold раз относительно эталона"""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if not reference:
+            continue
+        current = result.summary()["p50"]
+        if current > reference["p50"] * threshold and current - reference["p50"] > NOISE_FLOOR_MS:
+            regressions.append(f"{result.name}: p50 {current:.2f} мс, эталон {reference['p50']:.2f} мс "
+                               f"(x{current / reference['p50']:.2f})")
+    return regressions
+
+
+def format_table(results: List[BenchResult], baseline: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'замер':<32}{'min':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'эталон':>10}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        summary = result.summary()
+        reference = baseline.get(result.name, {}).get("p50")
+        ratio = f"x{summary['p50'] / reference:.2f}" if reference else "—"
+        lines.append(f"{result.name:<32}" + "".join(f"{summary[key]:>10.2f}" for key in
+                                                     ("min", "p50", "p90", "p99", "max"))
+                     + f"{ratio:>10}")
+    return "\n".join(lines)
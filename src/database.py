@@ -1,63 +1,415 @@
+import html
 import sqlite3
 import logging
-from datetime import datetime
-from typing import List, Optional
-from models import Task, Category, Priority, Status
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from models import (Task, TaskRecord, ReminderTask, Category, TaskStatistics, Status,
+                    PRIORITIES, STATUSES, PRIORITY_CODES, STATUS_CODES,
+                    encode_timestamp, decode_timestamp)
+from migrations import (run_migrations, rebuild_task_counters, ProgressCallback,
+                        CHANGE_INSERT, CHANGE_DELETE, CHANGE_TASK, CHANGE_CATEGORY)
+from query import TaskQuery, TaskSort
+from recurrence import next_due_date
 
 logger = logging.getLogger(__name__)
 
+# Файл базы по умолчанию (относительно рабочего каталога)
+DEFAULT_DB_PATH = "tasks.db"
+
+# Курсор постраничной выборки: (ключ сортировки, id) последней задачи страницы
+PageCursor = Tuple[int, int]
+
+# Размер порции для потокового чтения задач
+STREAM_CHUNK_SIZE = 500
+
+# Сколько последних записей журнала change_log сохраняется при открытии базы
+CHANGE_LOG_KEEP = 10000
+
+# Последний номер журнала изменений (версия базы)
+CHANGE_LOG_VERSION = "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"
+
+TASK_SELECT = '''
+    SELECT t.id, t.title, t.description, t.priority, t.status,
+           t.due_date, t.created_at, t.category_id, t.recurrence
+    FROM tasks t
+'''
+
+# Облегченная выборка для списка: описание не читается, на его месте NULL
+TASK_SUMMARY_SELECT = '''
+    SELECT t.id, t.title, NULL, t.priority, t.status,
+           t.due_date, t.created_at, t.category_id, t.recurrence
+    FROM tasks t
+'''
+
+# Выборка для планировщика напоминаний: только поля, по которым считается момент напоминания
+REMINDER_SELECT = '''
+    SELECT t.id, t.title, t.due_date, t.status, t.recurrence
+    FROM tasks t
+'''
+
+# Ранг полнотекстового поиска: совпадение в заголовке весит больше, чем в описании
+FTS_RANK = "bm25(tasks_fts, 10.0, 1.0)"
+
+# Индекс столбца с ключом сортировки в запросах составного фильтра
+SORT_KEY_COLUMN = 9
+
+TASK_INSERT = '''
+    INSERT INTO tasks (title, description, priority, status, due_date, created_at, category_id,
+                       recurrence)
+    VALUES (?, ?, ?, ?, ?, COALESCE(?, CAST(strftime('%s', 'now') AS INTEGER)), ?, ?)
+'''
+
+# description=None — описание не загружено (облегченная выборка) и не меняется
+TASK_UPDATE = '''
+    UPDATE tasks
+    SET title=?, description=COALESCE(?, description), priority=?, status=?,
+        due_date=?, category_id=?, recurrence=?
+    WHERE id=?
+'''
+
+# Выполненное повторение серии: копия задачи без правила повторения, со сроком повторения
+OCCURRENCE_INSERT = '''
+    INSERT INTO tasks (title, description, priority, status, due_date, created_at, category_id)
+    SELECT title, description, priority, ?, due_date, CAST(strftime('%s', 'now') AS INTEGER),
+           category_id
+    FROM tasks WHERE id=?
+'''
+
+
+def _highlight_html(text: str) -> str:
+    """Фрагмент FTS5 с маркерами совпадений \\x02...\\x03 в экранированный HTML"""
+    return html.escape(text).replace("\x02", "<b>").replace("\x03", "</b>")
+
+
+@lru_cache(maxsize=128)
+def _compile_task_sql(shape: tuple, use_fts: bool, keyset: bool, summary: bool = False) -> str:
+    """Текст SQL для формы запроса TaskQuery.
+
+    Одинаковая форма дает один и тот же текст, поэтому подготовленное выражение
+    берется из кэша соединения (cached_statements), а не компилируется заново.
+    """
+    has_category, n_priorities, n_statuses, has_text, has_from, has_to, sort = shape
+    # Ранжирование по bm25 возможно только с FTS5; без него найденное идет по дате создания
+    ranked = sort is TaskSort.RELEVANCE and use_fts
+    if sort is TaskSort.RELEVANCE and not ranked:
+        sort = TaskSort.NEWEST
+    conditions = []
+    if has_category:
+        conditions.append("t.category_id = ?")
+    if n_priorities:
+        conditions.append(f"t.priority IN ({', '.join('?' * n_priorities)})")
+    if n_statuses:
+        conditions.append(f"t.status IN ({', '.join('?' * n_statuses)})")
+    if has_text and not ranked:
+        if use_fts:
+            conditions.append("t.id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+        else:
+            conditions.append("(t.title LIKE ? OR t.description LIKE ?)")
+    if has_from:
+        conditions.append("t.due_date >= ?")
+    if has_to:
+        conditions.append("t.due_date < ?")
+    if keyset:
+        op = "<" if sort.direction == "DESC" else ">"
+        # Отдельная граница ключа дает поиск и по индексу на выражении (DUE_DATE):
+        # сравнение пар SQLite использует для поиска только по столбцам
+        conditions.append(f"{sort.key} {op}= ? AND ({sort.key}, t.id) {op} (?, ?)")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    description = "NULL" if summary else "t.description"
+    source = "tasks t"
+    if ranked:
+        # Ранг считается для всех совпадений; его параметр MATCH идет первым
+        source = f'''(
+            SELECT rowid, {FTS_RANK} AS rank FROM tasks_fts WHERE tasks_fts MATCH ?
+        ) r
+        JOIN tasks t ON t.id = r.rowid'''
+    return f'''
+        SELECT t.id, t.title, {description}, t.priority, t.status,
+               t.due_date, t.created_at, t.category_id, t.recurrence, {sort.key}
+        FROM {source}
+        {where_clause}
+        ORDER BY {sort.key} {sort.direction}, t.id {sort.direction}
+        LIMIT ?
+    '''
+
+
+@dataclass
+class ChangeSet:
+    """Изменения из журнала change_log после некоторой версии, свернутые по строкам.
+
+    Задача, добавленная и удаленная в пределах набора, в него не попадает.
+    """
+    # Версия, до которой прочитан журнал
+    version: int
+    inserted: Set[int] = field(default_factory=set)
+    updated: Set[int] = field(default_factory=set)
+    removed: Set[int] = field(default_factory=set)
+    categories_changed: bool = False
+    # False — журнал не покрывает диапазон (очищен) или изменений больше лимита:
+    # точечное обновление невозможно, нужна полная перезагрузка
+    complete: bool = True
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.removed
+                    or self.categories_changed or not self.complete)
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    """Набор PRAGMA-настроек для соединений SQLite"""
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 64 * 1024
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout_ms: int = 5000
+    temp_store: str = "MEMORY"
+    cached_statements: int = 256
+
+
+PERFORMANCE_PROFILES: Dict[str, PerformanceProfile] = {
+    # Быстрый режим по умолчанию: WAL + NORMAL, крупный кэш страниц
+    "default": PerformanceProfile(),
+    # Максимальная надежность: fsync на каждый коммит, без mmap
+    "safe": PerformanceProfile(synchronous="FULL", mmap_size=0),
+    # Для слабых машин и сетевых дисков
+    "low_memory": PerformanceProfile(cache_size_kib=8 * 1024, mmap_size=0,
+                                     temp_store="DEFAULT", cached_statements=64),
+}
+
+
+class _TransactionConnection:
+    """Соединение внутри DatabaseManager.transaction(): фиксирует только внешний блок"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "tasks.db"):
+    # Класс соединений SQLite (диагностика подставляет свой, см. instrumentation)
+    connection_factory = sqlite3.Connection
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH,
+                 profile: Union[str, PerformanceProfile] = "default",
+                 migration_progress: Optional[ProgressCallback] = None):
         self.db_path = db_path
+        self.migration_progress = migration_progress
+        if isinstance(profile, str):
+            profile = PERFORMANCE_PROFILES[profile]
+        self.profile = profile
+        # Одно долгоживущее соединение на поток, по идентификатору потока: PyQt вызывает
+        # каждое задание QThreadPool с новым состоянием Python, и threading.local
+        # в потоке пула не переживает задание. В _local — только текущая транзакция
+        self._local = threading.local()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        self._fts_enabled: Optional[bool] = None
+        # Диапазоны (first, last] номеров журнала, записанные транзакциями этого менеджера:
+        # свои изменения уже учтены приложением и из журнала не забираются
+        self._own_changes: Deque[Tuple[int, int]] = deque(maxlen=CHANGE_LOG_KEEP)
+        self._own_changes_lock = threading.Lock()
         self.init_database()
 
-    def init_database(self):
-        """Инициализация базы данных и создание таблиц"""
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие соединения и применение профиля производительности"""
+        profile = self.profile
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=profile.busy_timeout_ms / 1000,
+            cached_statements=profile.cached_statements,
+            check_same_thread=False,
+            factory=self.connection_factory
+        )
+        journal_mode = conn.execute(f"PRAGMA journal_mode={profile.journal_mode}").fetchone()[0]
+        conn.execute(f"PRAGMA synchronous={profile.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{profile.cache_size_kib}")
+        conn.execute(f"PRAGMA mmap_size={profile.mmap_size}")
+        conn.execute(f"PRAGMA busy_timeout={profile.busy_timeout_ms}")
+        conn.execute(f"PRAGMA temp_store={profile.temp_store}")
+        if journal_mode.upper() != profile.journal_mode.upper():
+            logger.warning(f"Journal mode {profile.journal_mode} unavailable, using {journal_mode}")
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Получение соединения текущего потока"""
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None:
+            return transaction
+        thread_id = threading.get_ident()
+        conn = self._connections.get(thread_id)
+        if conn is None:
+            conn = self._connect()
+            with self._connections_lock:
+                self._connections[thread_id] = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Несколько операций записи с одним коммитом в конце блока.
+
+        Методы менеджера внутри блока не фиксируют изменения сами; при исключении
+        откатывается весь блок. Вложенный блок становится частью внешнего.
+        """
+        current = getattr(self._local, "transaction", None)
+        if current is not None:
+            yield current
+            return
+        conn = self._get_connection()
+        if not conn.in_transaction:
+            # Блокировка записи сразу, чтобы не упереться в занятую базу посреди блока
+            conn.execute("BEGIN IMMEDIATE")
+        # Пока блокировка записи у этого соединения, новые номера журнала — только его
+        first = self._change_log_version(conn)
+        self._local.transaction = _TransactionConnection(conn)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            yield self._local.transaction
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            last = self._change_log_version(conn)
+            # Коммит и учет своих номеров — атомарно для pull_changes
+            with self._own_changes_lock:
+                conn.commit()
+                if last > first:
+                    self._own_changes.append((first, last))
+        finally:
+            self._local.transaction = None
 
-                # Таблица категорий
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS categories (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT NOT NULL UNIQUE,
-                        color TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+    def in_transaction(self) -> bool:
+        """Выполняется ли текущий поток внутри блока transaction().
 
-                # Таблица задач
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        description TEXT,
-                        priority TEXT NOT NULL,
-                        status TEXT NOT NULL,
-                        due_date TIMESTAMP,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        category_id INTEGER,
-                        FOREIGN KEY (category_id) REFERENCES categories (id)
-                    )
-                ''')
+        Методы записи, которые вне блока сообщают об ошибке результатом (False или 0),
+        внутри блока пробрасывают исключение: иначе откатилась бы не вся группа команд,
+        а зафиксировалась бы ее часть.
+        """
+        return getattr(self._local, "transaction", None) is not None
 
-                # Создание начальных категорий
-                default_categories = [
-                    ("Работа", "#FF6B6B"),
-                    ("Личное", "#4ECDC4"),
-                    ("Учеба", "#45B7D1"),
-                    ("Покупки", "#96CEB4")
-                ]
-
-                cursor.executemany(
-                    "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)",
-                    default_categories
-                )
+    @staticmethod
+    def _change_log_version(conn: sqlite3.Connection) -> int:
+        row = conn.execute(CHANGE_LOG_VERSION).fetchone()
+        return row[0] if row else 0
 
+    def data_version(self) -> int:
+        """Счетчик PRAGMA data_version: меняется после коммитов других соединений"""
+        return self._get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def stored_version(self) -> Tuple[str, int]:
+        """Идентификатор базы и ее версия (номер журнала изменений), сохраняющаяся между запусками"""
+        try:
+            row = self._get_connection().execute(
+                f"SELECT instance, COALESCE(({CHANGE_LOG_VERSION}), 0) FROM data_version WHERE id = 1"
+            ).fetchone()
+            return (row[0], row[1]) if row else ("", 0)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading data version: {e}")
+            return ("", -1)
+
+    def pull_changes(self, since: int, limit: int = STREAM_CHUNK_SIZE,
+                     include_own: bool = False) -> ChangeSet:
+        """Изменения других соединений и процессов после версии since (по журналу change_log).
+
+        Читается только диапазон журнала по первичному ключу, поэтому стоимость зависит
+        от числа изменений, а не от размера таблиц. Изменения, записанные транзакциями
+        этого менеджера, пропускаются, если не задан include_own.
+        """
+        with self._own_changes_lock:
+            rows = self._get_connection().execute('''
+                SELECT version, entity, row_id, op FROM change_log
+                WHERE version > ? ORDER BY version LIMIT ?
+            ''', (since, limit + 1)).fetchall()
+            own = [item for item in self._own_changes if item[1] > since]
+            if include_own:
+                own = []
+            else:
+                self._own_changes = deque(own, maxlen=CHANGE_LOG_KEEP)
+
+        if not rows:
+            return ChangeSet(version=since)
+        changes = ChangeSet(version=rows[-1][0])
+        # Начало диапазона уже удалено из журнала или изменений слишком много
+        if rows[0][0] != since + 1 or len(rows) > limit:
+            changes.complete = False
+            return changes
+
+        # Первая и последняя операция с каждой задачей
+        first_ops: Dict[int, int] = {}
+        last_ops: Dict[int, int] = {}
+        for version, entity, row_id, op in rows:
+            if any(first < version <= last for first, last in own):
+                continue
+            if entity == CHANGE_CATEGORY:
+                changes.categories_changed = True
+            elif entity == CHANGE_TASK:
+                first_ops.setdefault(row_id, op)
+                last_ops[row_id] = op
+        for task_id, last_op in last_ops.items():
+            created = first_ops[task_id] == CHANGE_INSERT
+            if last_op == CHANGE_DELETE:
+                if not created:
+                    changes.removed.add(task_id)
+            elif created:
+                changes.inserted.add(task_id)
+            else:
+                changes.updated.add(task_id)
+        return changes
+
+    def get_tasks_by_ids(self, task_ids: Iterable[int], summary: bool = False) -> List[Task]:
+        """Задачи с указанными id (отсутствующие в базе пропускаются)"""
+        task_ids = list(task_ids)
+        tasks = []
+        try:
+            with self._get_connection() as conn:
+                for start in range(0, len(task_ids), STREAM_CHUNK_SIZE):
+                    chunk = task_ids[start:start + STREAM_CHUNK_SIZE]
+                    rows = conn.execute(f'''
+                        {TASK_SUMMARY_SELECT if summary else TASK_SELECT}
+                        WHERE t.id IN ({', '.join('?' * len(chunk))})
+                    ''', chunk).fetchall()
+                    tasks.extend(self._decode_rows(rows))
+            return tasks
+        except sqlite3.Error as e:
+            logger.error(f"Error getting tasks by id: {e}")
+            raise
+
+    def close(self):
+        """Закрытие всех открытых соединений"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing connection: {e}")
+        self._local = threading.local()
+        logger.info("Database connections closed")
+
+    def init_database(self):
+        """Инициализация базы данных и применение миграций схемы"""
+        try:
+            with self._get_connection() as conn:
+                version = run_migrations(conn, progress_callback=self.migration_progress)
+                logger.info(f"Database initialized successfully (schema version {version})")
+                conn.execute(f"DELETE FROM change_log WHERE version <= ({CHANGE_LOG_VERSION}) - ?",
+                             (CHANGE_LOG_KEEP,))
                 conn.commit()
-                logger.info("Database initialized successfully")
 
         except sqlite3.Error as e:
             logger.error(f"Database initialization error: {e}")
@@ -66,19 +418,9 @@ class DatabaseManager:
     def add_task(self, task: Task) -> int:
         """Добавление новой задачи"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO tasks (title, description, priority, status, due_date, category_id)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    task.title,
-                    task.description,
-                    task.priority.value,
-                    task.status.value,
-                    task.due_date.isoformat() if task.due_date else None,
-                    task.category_id
-                ))
+                cursor.execute(TASK_INSERT, self._insert_params(task))
                 task_id = cursor.lastrowid
                 conn.commit()
                 logger.info(f"Task added with ID: {task_id}")
@@ -87,57 +429,44 @@ class DatabaseManager:
             logger.error(f"Error adding task: {e}")
             raise
 
-    def get_all_tasks(self) -> List[Task]:
-        """Получение всех задач"""
+    def get_all_tasks(self, summary: bool = False) -> List[Task]:
+        """Получение всех задач (summary — без описаний, для списка)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT t.id, t.title, t.description, t.priority, t.status, 
-                           t.due_date, t.created_at, t.category_id
-                    FROM tasks t
+            with self._get_connection() as conn:
+                cursor = conn.execute(f'''
+                    {TASK_SUMMARY_SELECT if summary else TASK_SELECT}
                     ORDER BY t.created_at DESC
                 ''')
-                tasks = []
-                for row in cursor.fetchall():
-                    try:
-                        task = Task(
-                            id=row[0],
-                            title=row[1],
-                            description=row[2],
-                            priority=Priority(row[3]),
-                            status=Status(row[4]),
-                            due_date=datetime.fromisoformat(row[5]) if row[5] else None,
-                            created_at=datetime.fromisoformat(row[6]),
-                            category_id=row[7]
-                        )
-                        tasks.append(task)
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Skipping invalid task data: {e}")
-                        continue
-                return tasks
+                return self._decode_rows(cursor.fetchall())
         except sqlite3.Error as e:
             logger.error(f"Error getting tasks: {e}")
             return []
 
+    def get_task(self, task_id: int) -> Optional[Task]:
+        """Задача целиком, включая описание (например, для окна редактирования)"""
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(f'''
+                    {TASK_SELECT}
+                    WHERE t.id=?
+                ''', (task_id,)).fetchall()
+                tasks = self._decode_rows(rows)
+                return tasks[0] if tasks else None
+        except sqlite3.Error as e:
+            logger.error(f"Error getting task {task_id}: {e}")
+            return None
+
+    def get_tasks_page(self, limit: int,
+                       cursor: Optional[PageCursor] = None) -> Tuple[List[Task], Optional[PageCursor]]:
+        """Страница задач (новые сверху) и курсор для следующей страницы"""
+        return self.query_tasks_page(TaskQuery(), limit, cursor)
+
     def update_task(self, task: Task) -> bool:
-        """Обновление задачи"""
+        """Обновление задачи (description=None — описание не загружено и не меняется)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE tasks 
-                    SET title=?, description=?, priority=?, status=?, due_date=?, category_id=?
-                    WHERE id=?
-                ''', (
-                    task.title,
-                    task.description,
-                    task.priority.value,
-                    task.status.value,
-                    task.due_date.isoformat() if task.due_date else None,
-                    task.category_id,
-                    task.id
-                ))
+                cursor.execute(TASK_UPDATE, self._update_params(task))
                 conn.commit()
                 success = cursor.rowcount > 0
                 if success:
@@ -145,12 +474,14 @@ class DatabaseManager:
                 return success
         except sqlite3.Error as e:
             logger.error(f"Error updating task: {e}")
+            if self.in_transaction():
+                raise
             return False
 
     def delete_task(self, task_id: int) -> bool:
         """Удаление задачи"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM tasks WHERE id=?', (task_id,))
                 conn.commit()
@@ -160,12 +491,173 @@ class DatabaseManager:
                 return success
         except sqlite3.Error as e:
             logger.error(f"Error deleting task: {e}")
+            if self.in_transaction():
+                raise
             return False
 
+    def add_tasks(self, tasks: Iterable[Task]) -> List[int]:
+        """Добавление набора задач одной транзакцией; возвращает id в порядке задач"""
+        params = [self._insert_params(task) for task in tasks]
+        if not params:
+            return []
+        try:
+            with self.transaction() as conn:
+                conn.executemany(TASK_INSERT, params)
+                # При AUTOINCREMENT строки одной транзакции получают id подряд
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            logger.info(f"Tasks added: {len(params)}")
+            return list(range(last_id - len(params) + 1, last_id + 1))
+        except sqlite3.Error as e:
+            logger.error(f"Error adding tasks: {e}")
+            raise
+
+    def update_tasks(self, tasks: Iterable[Task]) -> int:
+        """Обновление набора задач одной транзакцией; возвращает число измененных строк"""
+        params = [self._update_params(task) for task in tasks]
+        if not params:
+            return 0
+        try:
+            with self.transaction() as conn:
+                count = conn.executemany(TASK_UPDATE, params).rowcount
+            logger.info(f"Tasks updated: {count}")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Error updating tasks: {e}")
+            if self.in_transaction():
+                raise
+            return 0
+
+    def delete_tasks(self, task_ids: Iterable[int]) -> int:
+        """Удаление набора задач одной транзакцией; возвращает число удаленных строк"""
+        params = [(task_id,) for task_id in task_ids]
+        if not params:
+            return 0
+        try:
+            with self.transaction() as conn:
+                count = conn.executemany('DELETE FROM tasks WHERE id=?', params).rowcount
+            logger.info(f"Tasks deleted: {count}")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting tasks: {e}")
+            if self.in_transaction():
+                raise
+            return 0
+
+    def set_status_many(self, task_ids: Iterable[int], status: Status) -> int:
+        """Смена статуса набора задач одной транзакцией; возвращает число измененных строк"""
+        code = STATUS_CODES[status]
+        params = [(code, task_id) for task_id in task_ids]
+        if not params:
+            return 0
+        try:
+            with self.transaction() as conn:
+                count = conn.executemany('UPDATE tasks SET status=? WHERE id=?', params).rowcount
+            logger.info(f"Task status set to '{status.value}': {count}")
+            return count
+        except sqlite3.Error as e:
+            logger.error(f"Error setting task status: {e}")
+            if self.in_transaction():
+                raise
+            return 0
+
+    def complete_occurrences(self, task_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Завершение текущего повторения у набора серий одной транзакцией.
+
+        Повторение записывается отдельной завершенной задачей, а срок серии переносится
+        на следующее повторение (см. next_due_date); у закончившейся серии меняется
+        только статус. Возвращает id серии -> id записанного повторения (None — серия
+        закончилась); отсутствующие в базе серии пропускаются.
+        """
+        completed = STATUS_CODES[Status.COMPLETED]
+        results: Dict[int, Optional[int]] = {}
+        try:
+            with self.transaction() as conn:
+                for task_id in task_ids:
+                    row = conn.execute("SELECT recurrence, due_date FROM tasks WHERE id=?",
+                                       (task_id,)).fetchone()
+                    if row is None:
+                        continue
+                    next_due = next_due_date(row[0], decode_timestamp(row[1]))
+                    if next_due is None:
+                        conn.execute('UPDATE tasks SET status=? WHERE id=?', (completed, task_id))
+                        results[task_id] = None
+                        continue
+                    results[task_id] = conn.execute(OCCURRENCE_INSERT, (completed, task_id)).lastrowid
+                    conn.execute('UPDATE tasks SET due_date=? WHERE id=?',
+                                 (encode_timestamp(next_due), task_id))
+            logger.info(f"Occurrences completed: {len(results)}")
+            return results
+        except sqlite3.Error as e:
+            logger.error(f"Error completing occurrences: {e}")
+            raise
+
+    @staticmethod
+    def _insert_params(task: Task) -> tuple:
+        return (
+            task.title,
+            task.description,
+            PRIORITY_CODES[task.priority],
+            STATUS_CODES[task.status],
+            encode_timestamp(task.due_date),
+            encode_timestamp(task.created_at),
+            task.category_id,
+            task.recurrence
+        )
+
+    @staticmethod
+    def _update_params(task: Task) -> tuple:
+        return (
+            task.title,
+            task.description,
+            PRIORITY_CODES[task.priority],
+            STATUS_CODES[task.status],
+            encode_timestamp(task.due_date),
+            task.category_id,
+            task.recurrence,
+            task.id
+        )
+
+    def get_statistics(self) -> TaskStatistics:
+        """Статистика задач из счетчиков, поддерживаемых триггерами"""
+        stats = TaskStatistics()
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute('''
+                    SELECT category_id, status, priority, SUM(count)
+                    FROM task_counters
+                    GROUP BY category_id, status, priority
+                    HAVING SUM(count) > 0
+                ''')
+                for category_id, status, priority, count in cursor.fetchall():
+                    try:
+                        status, priority = STATUSES[status], PRIORITIES[priority]
+                    except (IndexError, TypeError) as e:
+                        logger.warning(f"Skipping invalid counter data: {e}")
+                        continue
+                    category_id = category_id or None
+                    stats.total += count
+                    stats.by_status[status] = stats.by_status.get(status, 0) + count
+                    stats.by_priority[priority] = stats.by_priority.get(priority, 0) + count
+                    stats.by_category[category_id] = stats.by_category.get(category_id, 0) + count
+            return stats
+        except sqlite3.Error as e:
+            logger.error(f"Error getting statistics: {e}")
+            return stats
+
+    def rebuild_statistics(self):
+        """Пересчет счетчиков статистики по всем задачам"""
+        try:
+            with self._get_connection() as conn:
+                rebuild_task_counters(conn)
+                logger.info("Task counters rebuilt")
+        except sqlite3.Error as e:
+            logger.error(f"Error rebuilding statistics: {e}")
+            raise
+
     def get_categories(self) -> List[Category]:
         """Получение всех категорий"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT id, name, color, created_at FROM categories')
                 categories = []
@@ -185,7 +677,7 @@ class DatabaseManager:
     def add_category(self, category: Category) -> int:
         """Добавление новой категории"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     'INSERT INTO categories (name, color) VALUES (?, ?)',
@@ -202,7 +694,7 @@ class DatabaseManager:
     def delete_category(self, category_id: int) -> bool:
         """Удаление категории"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._get_connection() as conn:
                 cursor = conn.cursor()
 
                 # Сначала обновляем задачи этой категории (устанавливаем category_id = NULL)
@@ -218,63 +710,263 @@ class DatabaseManager:
                 return success
         except sqlite3.Error as e:
             logger.error(f"Error deleting category: {e}")
+            if self.in_transaction():
+                raise
             return False
-    def get_tasks_by_category(self, category_id: int) -> List[Task]:
-        """Получение задач по категории"""
+    def get_tasks_by_category(self, category_id: int, summary: bool = False) -> List[Task]:
+        """Получение задач по категории (summary — без описаний, для списка)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, title, description, priority, status, due_date, created_at, category_id
-                    FROM tasks 
-                    WHERE category_id=?
-                    ORDER BY created_at DESC
+            with self._get_connection() as conn:
+                cursor = conn.execute(f'''
+                    {TASK_SUMMARY_SELECT if summary else TASK_SELECT}
+                    WHERE t.category_id=?
+                    ORDER BY t.created_at DESC
                 ''', (category_id,))
-
-                tasks = []
-                for row in cursor.fetchall():
-                    task = Task(
-                        id=row[0],
-                        title=row[1],
-                        description=row[2],
-                        priority=Priority(row[3]),
-                        status=Status(row[4]),
-                        due_date=datetime.fromisoformat(row[5]) if row[5] else None,
-                        created_at=datetime.fromisoformat(row[6]),
-                        category_id=row[7]
-                    )
-                    tasks.append(task)
-                return tasks
+                return self._decode_rows(cursor.fetchall())
         except sqlite3.Error as e:
             logger.error(f"Error getting tasks by category: {e}")
             return []
 
-    def search_tasks(self, search_text: str) -> List[Task]:
-        """Поиск задач по тексту"""
+    def get_tasks_by_category_page(self, category_id: int, limit: int,
+                                   cursor: Optional[PageCursor] = None
+                                   ) -> Tuple[List[Task], Optional[PageCursor]]:
+        """Страница задач категории и курсор для следующей страницы"""
+        return self.query_tasks_page(TaskQuery(category_id=category_id), limit, cursor)
+
+    def search_tasks_page(self, search_text: str, limit: int,
+                          cursor: Optional[PageCursor] = None
+                          ) -> Tuple[List[Task], Optional[PageCursor]]:
+        """Страница найденных задач (новые сверху) и курсор для следующей страницы"""
+        return self.query_tasks_page(TaskQuery(text=search_text), limit, cursor)
+
+    def get_reminder_tasks(self, today: date, statuses: Iterable[Status]) -> List[ReminderTask]:
+        """Задачи для напоминаний: со статусом из statuses и сроком не раньше today,
+        а также серии с прошедшим сроком — их ближайшее повторение еще впереди.
+
+        Читаются только поля, нужные планировщику, без описаний и дат создания.
+        """
+        codes = [STATUS_CODES[status] for status in statuses]
+        if not codes:
+            return []
+        marks = ", ".join("?" * len(codes))
+        due_from = encode_timestamp(today)
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(f'''
+                    {REMINDER_SELECT}
+                    -- Задач со сроком впереди обычно мало: поиск по индексу срока, а не статуса
+                    WHERE t.due_date >= ? AND +t.status IN ({marks})
+                    UNION ALL
+                    {REMINDER_SELECT}
+                    -- "+" исключает индекс статуса: серий мало, их дает частичный индекс
+                    WHERE t.recurrence IS NOT NULL AND t.due_date < ? AND +t.status IN ({marks})
+                ''', [due_from, *codes, due_from, *codes]).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error getting reminder tasks: {e}")
+            raise
+        tasks = []
+        for row in rows:
+            try:
+                tasks.append(ReminderTask.from_row(row))
+            except (ValueError, IndexError, TypeError) as e:
+                logger.warning(f"Skipping invalid task data: {e}")
+        return tasks
+
+    def iter_all_tasks(self, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Task]:
+        """Потоковое чтение всех задач (новые сверху)"""
+        return self.iter_query_tasks(TaskQuery(), chunk_size)
+
+    def iter_tasks_by_category(self, category_id: int,
+                               chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Task]:
+        """Потоковое чтение задач категории"""
+        return self.iter_query_tasks(TaskQuery(category_id=category_id), chunk_size)
+
+    def iter_search_tasks(self, search_text: str,
+                          chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Task]:
+        """Потоковое чтение найденных задач"""
+        return self.iter_query_tasks(TaskQuery(text=search_text), chunk_size)
+
+    def query_tasks(self, query: TaskQuery, limit: Optional[int] = None,
+                    summary: bool = False) -> List[Task]:
+        """Задачи, удовлетворяющие составному фильтру"""
+        sql, params = self._compile_query(query, keyset=False, summary=summary)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, title, description, priority, status, due_date, created_at, category_id
-                    FROM tasks 
-                    WHERE title LIKE ? OR description LIKE ?
-                    ORDER BY created_at DESC
-                ''', (f'%{search_text}%', f'%{search_text}%'))
-
-                tasks = []
-                for row in cursor.fetchall():
-                    task = Task(
-                        id=row[0],
-                        title=row[1],
-                        description=row[2],
-                        priority=Priority(row[3]),
-                        status=Status(row[4]),
-                        due_date=datetime.fromisoformat(row[5]) if row[5] else None,
-                        created_at=datetime.fromisoformat(row[6]),
-                        category_id=row[7]
-                    )
-                    tasks.append(task)
-                return tasks
+            with self._get_connection() as conn:
+                rows = conn.execute(sql, (*params, -1 if limit is None else limit)).fetchall()
+                return self._decode_rows(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error querying tasks: {e}")
+            return []
+
+    def query_tasks_page(self, query: TaskQuery, limit: int,
+                         cursor: Optional[PageCursor] = None, summary: bool = False
+                         ) -> Tuple[List[Task], Optional[PageCursor]]:
+        """Keyset-выборка страницы по (ключ сортировки, id) без OFFSET"""
+        sql, params = self._compile_query(query, keyset=cursor is not None, summary=summary)
+        if cursor is not None:
+            params = (*params, cursor[0], *cursor)
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(sql, (*params, limit)).fetchall()
+                next_cursor = (rows[-1][SORT_KEY_COLUMN], rows[-1][0]) if len(rows) == limit else None
+                return self._decode_rows(rows), next_cursor
+        except sqlite3.Error as e:
+            logger.error(f"Error getting tasks page: {e}")
+            return [], None
+
+    def iter_query_tasks(self, query: TaskQuery, chunk_size: int = STREAM_CHUNK_SIZE,
+                         summary: bool = False) -> Iterator[Task]:
+        """Чтение результата составного фильтра порциями через fetchmany"""
+        sql, params = self._compile_query(query, keyset=False, summary=summary)
+        try:
+            # Отдельный курсор: чтение не мешает другим запросам этого соединения
+            cursor = self._get_connection().execute(sql, (*params, -1))
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield from self._decode_rows(rows)
+            finally:
+                cursor.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error streaming tasks: {e}")
+            raise
+
+    def _compile_query(self, query: TaskQuery, keyset: bool,
+                       summary: bool = False) -> Tuple[str, tuple]:
+        """SQL и параметры для составного фильтра (LIMIT и курсор добавляет вызывающий)"""
+        text = query.text.strip()
+        fts_query = self.build_fts_query(text) if text and self.fts_enabled else None
+        sql = _compile_task_sql(query.shape(), fts_query is not None, keyset, summary)
+
+        ranked = fts_query is not None and query.sort is TaskSort.RELEVANCE
+        params = [fts_query] if ranked else []
+        if query.category_id is not None:
+            params.append(query.category_id)
+        params.extend(sorted(PRIORITY_CODES[p] for p in query.priorities))
+        params.extend(sorted(STATUS_CODES[s] for s in query.statuses))
+        if text and not ranked:
+            if fts_query:
+                params.append(fts_query)
+            else:
+                params.extend((f'%{text}%', f'%{text}%'))
+        if query.due_from is not None:
+            params.append(encode_timestamp(query.due_from))
+        if query.due_to is not None:
+            params.append(encode_timestamp(query.due_to + timedelta(days=1)))
+        return sql, tuple(params)
+
+    @staticmethod
+    def _row_to_task(row) -> Task:
+        """Преобразование строки таблицы tasks в задачу с ленивым декодированием дат"""
+        return TaskRecord.from_row(row)
+
+    def _decode_rows(self, rows) -> List[Task]:
+        """Преобразование строк в задачи с пропуском поврежденных записей"""
+        tasks = []
+        for row in rows:
+            try:
+                tasks.append(self._row_to_task(row))
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                logger.warning(f"Skipping invalid task data: {e}")
+        return tasks
+
+    @property
+    def fts_enabled(self) -> bool:
+        """Доступен ли полнотекстовый индекс tasks_fts"""
+        if self._fts_enabled is None:
+            try:
+                self._get_connection().execute("SELECT 1 FROM tasks_fts LIMIT 0")
+                self._fts_enabled = True
+            except sqlite3.Error:
+                self._fts_enabled = False
+        return self._fts_enabled
+
+    @staticmethod
+    def build_fts_query(search_text: str) -> Optional[str]:
+        """Построение префиксного запроса FTS5 из пользовательского ввода"""
+        terms = []
+        for word in search_text.split():
+            if not any(ch.isalnum() for ch in word):
+                continue
+            # Каждое слово экранируется как строка и ищется по префиксу
+            terms.append('"' + word.replace('"', '""') + '"*')
+        return " ".join(terms) or None
+
+    def search_tasks(self, search_text: str, limit: Optional[int] = None,
+                     summary: bool = False) -> List[Task]:
+        """Поиск задач по тексту (FTS5 с ранжированием bm25, иначе LIKE)"""
+        description = "NULL" if summary else "t.description"
+        fts_query = self.build_fts_query(search_text) if self.fts_enabled else None
+        try:
+            with self._get_connection() as conn:
+                if fts_query:
+                    cursor = conn.execute(f'''
+                        SELECT t.id, t.title, {description}, t.priority, t.status,
+                               t.due_date, t.created_at, t.category_id, t.recurrence
+                        FROM tasks_fts
+                        JOIN tasks t ON t.id = tasks_fts.rowid
+                        WHERE tasks_fts MATCH ?
+                        ORDER BY {FTS_RANK}
+                        LIMIT ?
+                    ''', (fts_query, -1 if limit is None else limit))
+                else:
+                    cursor = conn.execute(f'''
+                        {TASK_SUMMARY_SELECT if summary else TASK_SELECT}
+                        WHERE t.title LIKE ? OR t.description LIKE ?
+                        ORDER BY t.created_at DESC
+                        LIMIT ?
+                    ''', (f'%{search_text}%', f'%{search_text}%', -1 if limit is None else limit))
+
+                return self._decode_rows(cursor.fetchall())
         except sqlite3.Error as e:
             logger.error(f"Error searching tasks: {e}")
             return []
+
+    def search_task_ids(self, search_text: str, task_ids: Iterable[int]) -> Set[int]:
+        """id задач из task_ids, которые находит поиск по тексту (FTS5, иначе LIKE)"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return set()
+        marks = ", ".join("?" * len(task_ids))
+        fts_query = self.build_fts_query(search_text) if self.fts_enabled else None
+        try:
+            with self._get_connection() as conn:
+                if fts_query:
+                    cursor = conn.execute(
+                        f"SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ? AND rowid IN ({marks})",
+                        (fts_query, *task_ids))
+                else:
+                    cursor = conn.execute(f'''
+                        SELECT id FROM tasks
+                        WHERE id IN ({marks}) AND (title LIKE ? OR description LIKE ?)
+                    ''', (*task_ids, f'%{search_text}%', f'%{search_text}%'))
+                return {row[0] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"Error matching search text: {e}")
+            raise
+
+    def search_snippets(self, search_text: str, task_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+        """Подсвеченные фрагменты найденных задач task_ids: id -> (заголовок, фрагмент описания).
+
+        Текст экранирован для HTML, совпадения выделены тегами <b>.
+        """
+        fts_query = self.build_fts_query(search_text) if self.fts_enabled else None
+        task_ids = list(task_ids)
+        if not fts_query or not task_ids:
+            return {}
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(f'''
+                    SELECT rowid,
+                           highlight(tasks_fts, 0, char(2), char(3)),
+                           snippet(tasks_fts, 1, char(2), char(3), '…', 12)
+                    FROM tasks_fts
+                    WHERE tasks_fts MATCH ? AND rowid IN ({', '.join('?' * len(task_ids))})
+                ''', (fts_query, *task_ids))
+                return {row[0]: (_highlight_html(row[1]), _highlight_html(row[2] or ""))
+                        for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"Error getting search snippets: {e}")
+            return {}
@@ -0,0 +1,338 @@
+"""Необязательная диагностика производительности.
+
+Включается флагом --profile у src/main.py или переменной окружения SMART_TODO_PROFILE=1.
+Пока диагностика не включена, классы приложения не изменяются и накладных расходов нет.
+"""
+import os
+import time
+import inspect
+import logging
+import pstats
+import sqlite3
+import cProfile
+import functools
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENV_ENABLED = "SMART_TODO_PROFILE"
+ENV_SLOW_MS = "SMART_TODO_SLOW_QUERY_MS"
+ENV_CPROFILE = "SMART_TODO_CPROFILE"
+ENV_REPORT = "SMART_TODO_PROFILE_REPORT"
+
+DEFAULT_SLOW_QUERY_MS = 50.0
+
+# Верхние границы корзин гистограммы, мс (последняя корзина — все, что дольше)
+HISTOGRAM_BOUNDS_MS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Timer:
+    """Число вызовов, суммарное и максимальное время, гистограмма длительностей"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms < bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+
+class Profiler:
+    """Собранная статистика: таймеры методов, медленные запросы, счетчики"""
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.timers: Dict[str, Timer] = {}
+        self.counters: Dict[str, int] = {}
+        self.slow_queries: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Timer()
+            timer.add(elapsed_ms)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def slow_query(self, sql: str, elapsed_ms: float, plan: List[str]):
+        sql = " ".join(sql.split())
+        entry = f"{elapsed_ms:.1f} мс: {sql}" + "".join(f"\n    {line}" for line in plan)
+        with self._lock:
+            self.slow_queries.append(entry)
+        logger.warning(f"Медленный запрос {entry}")
+
+    def report(self) -> str:
+        """Текстовый отчет: таймеры по убыванию суммарного времени и гистограммы"""
+        header = "".join(f"{'<' + str(bound):>6}" for bound in HISTOGRAM_BOUNDS_MS) + f"{'больше':>7}"
+        lines = [f"{'метод':<44}{'вызовы':>8}{'всего, мс':>12}{'среднее':>10}{'макс':>10}  {header}"]
+        timers = sorted(self.timers.items(), key=lambda item: item[1].total_ms, reverse=True)
+        for name, timer in timers:
+            histogram = "".join(f"{n:>6}" for n in timer.buckets[:-1]) + f"{timer.buckets[-1]:>7}"
+            lines.append(f"{name:<44}{timer.count:>8}{timer.total_ms:>12.1f}"
+                         f"{timer.total_ms / timer.count:>10.2f}{timer.max_ms:>10.1f}  {histogram}")
+        if self.counters:
+            lines.append("")
+            lines.extend(f"{name}: {value}" for name, value in sorted(self.counters.items()))
+        if self.slow_queries:
+            lines.append("")
+            lines.append(f"Медленные запросы (дольше {self.slow_query_ms:g} мс): {len(self.slow_queries)}")
+            lines.extend(self.slow_queries)
+        return "\n".join(lines)
+
+
+class StartupTimeline:
+    """Отметки этапов запуска (--profile-startup): время от старта процесса и от предыдущей отметки"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.marks: List[tuple] = []
+
+    def mark(self, name: str):
+        self.marks.append((name, time.perf_counter()))
+
+    def report(self) -> str:
+        lines = [f"{'этап':<36}{'от старта, мс':>15}{'этап, мс':>10}"]
+        previous = self.started
+        for name, moment in self.marks:
+            lines.append(f"{name:<36}{(moment - self.started) * 1000:>15.1f}{(moment - previous) * 1000:>10.1f}")
+            previous = moment
+        return "\n".join(lines)
+
+
+# Активный профилировщик; None — диагностика выключена
+profiler: Optional[Profiler] = None
+_cprofile: Optional[cProfile.Profile] = None
+# Профили cProfile фоновых потоков по id потока ОС; при выходе объединяются с основным
+_thread_profiles: Dict[int, cProfile.Profile] = {}
+_thread_profiles_lock = threading.Lock()
+_cprofile_path: Optional[Path] = None
+_report_path: Optional[Path] = None
+
+
+def timed(name: str, func):
+    """Обертка func с замером времени; лишние аргументы сигналов Qt отбрасываются"""
+    try:
+        params = inspect.signature(func).parameters.values()
+        variadic = any(p.kind is p.VAR_POSITIONAL for p in params)
+        max_args = None if variadic else sum(
+            p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+    except (TypeError, ValueError):
+        max_args = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if max_args is not None:
+            args = args[:max_args]
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record(name, (time.perf_counter() - start) * 1000)
+    return wrapper
+
+
+def instrument_class(cls, skip=()):
+    """Замер времени всех методов, объявленных в классе (кроме служебных и генераторов)"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("__") or attr in skip:
+            continue
+        if isinstance(value, staticmethod):
+            setattr(cls, attr, staticmethod(timed(f"{cls.__name__}.{attr}", value.__func__)))
+        elif inspect.isfunction(value) and not inspect.isgeneratorfunction(value):
+            setattr(cls, attr, timed(f"{cls.__name__}.{attr}", value))
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Курсор с журналом медленных запросов (выполнение и выборка строк)"""
+
+    def execute(self, sql, parameters=()):
+        self._sql, self._parameters, self._logged = sql, parameters, False
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+            self._check()
+
+    def executemany(self, sql, seq_of_parameters):
+        # Планы пакетных изменений не строятся: параметров много, а тексты запросов простые
+        self._sql, self._parameters, self._logged = sql, None, False
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+            self._check()
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            if hasattr(self, "_sql"):
+                self._elapsed_ms += (time.perf_counter() - start) * 1000
+                self._check()
+
+    def _check(self):
+        if self._logged or self._elapsed_ms < profiler.slow_query_ms:
+            return
+        self._logged = True
+        profiler.count("slow_queries")
+        profiler.slow_query(self._sql, self._elapsed_ms, self._query_plan())
+
+    def _query_plan(self) -> List[str]:
+        if self._parameters is None:
+            return []
+        try:
+            # Базовый курсор: план не должен попасть в журнал сам
+            rows = sqlite3.Cursor(self.connection).execute(
+                f"EXPLAIN QUERY PLAN {self._sql}", self._parameters).fetchall()
+        except sqlite3.Error:
+            return []
+        return [row[-1] for row in rows]
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Соединение, все запросы которого идут через ProfilingCursor"""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _count_decoded(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tasks = func(*args, **kwargs)
+        profiler.count("rows_decoded", len(tasks))
+        return tasks
+    return wrapper
+
+
+def _thread_profile() -> cProfile.Profile:
+    ident = threading.get_ident()
+    with _thread_profiles_lock:
+        profile = _thread_profiles.get(ident)
+        if profile is None:
+            profile = _thread_profiles[ident] = cProfile.Profile()
+    return profile
+
+
+def _enable_profile(profile: cProfile.Profile):
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12+: cProfile работает через sys.monitoring, один профиль на процесс,
+        # и основной профиль уже видит все потоки
+        pass
+
+
+def _start_thread_profile(frame, event, arg):
+    """Хук threading.setprofile: первое событие нового потока включает его профиль"""
+    _enable_profile(_thread_profile())
+
+
+def _profiled_run(run):
+    """Профилирование заданий QThreadPool: потоки Qt не проходят через threading.setprofile"""
+    @functools.wraps(run)
+    def wrapper(self):
+        profile = _thread_profile()
+        _enable_profile(profile)
+        try:
+            return run(self)
+        finally:
+            profile.disable()
+    return wrapper
+
+
+def enable(slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+           cprofile_path: Optional[str] = None, report_path: Optional[str] = None):
+    """Включение диагностики; вызывать до создания DatabaseManager и MainWindow"""
+    global profiler, _cprofile, _cprofile_path, _report_path
+    if profiler is not None:
+        return
+    profiler = Profiler(slow_query_ms)
+    _report_path = Path(report_path) if report_path else None
+
+    from database import DatabaseManager
+    from ui.main_window import MainWindow
+    DatabaseManager._decode_rows = _count_decoded(DatabaseManager._decode_rows)
+    # Вызываемые на каждую строку или соединение методы не оборачиваются: их замер дороже их самих
+    instrument_class(DatabaseManager, skip=("_get_connection", "_row_to_task", "_decode_rows",
+                                            "_insert_params", "_update_params", "transaction"))
+    instrument_class(MainWindow)
+    DatabaseManager.connection_factory = ProfilingConnection
+
+    if cprofile_path:
+        from ui.startup_loader import _Job
+        from ui.search_controller import SearchWorker
+        # Кроме потока GUI профилируются поток записи (TaskWriter), загрузка при запуске и поиск
+        for runnable in (_Job, SearchWorker):
+            runnable.run = _profiled_run(runnable.run)
+        threading.setprofile(_start_thread_profile)
+        _cprofile_path = Path(cprofile_path)
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+    logger.info(f"Диагностика производительности включена (медленные запросы от {slow_query_ms:g} мс)")
+
+
+def enable_from_env():
+    """Включение по переменным окружения SMART_TODO_PROFILE и связанным"""
+    if os.environ.get(ENV_ENABLED, "") not in ("", "0"):
+        enable(slow_query_ms=float(os.environ.get(ENV_SLOW_MS, DEFAULT_SLOW_QUERY_MS)),
+               cprofile_path=os.environ.get(ENV_CPROFILE) or None,
+               report_path=os.environ.get(ENV_REPORT) or None)
+
+
+def finish():
+    """Отчет при выходе: журнал, файл отчета и файл pstats"""
+    if profiler is None:
+        return
+    if _cprofile is not None:
+        threading.setprofile(None)
+        _cprofile.disable()
+        stats = pstats.Stats(_cprofile)
+        with _thread_profiles_lock:
+            for profile in _thread_profiles.values():
+                profile.create_stats()
+                if profile.stats:
+                    stats.add(profile)
+        stats.dump_stats(str(_cprofile_path))
+        logger.info(f"Профиль cProfile сохранен: {_cprofile_path}")
+    report = profiler.report()
+    logger.info(f"Статистика производительности:\n{report}")
+    if _report_path is not None:
+        _report_path.write_text(report + "\n", encoding="utf-8")
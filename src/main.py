@@ -1,10 +1,18 @@
 import sys
+import time
+
+# Начало запуска: точка отсчета для --profile-startup
+STARTED_AT = time.perf_counter()
+
 import os
 import logging
+import argparse
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
 
+QT_IMPORTED_AT = time.perf_counter()
+
 # Настройка путей для сборки
 if getattr(sys, 'frozen', False):
     # Если приложение собрано в exe
@@ -29,15 +37,72 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args(argv):
+    """Параметры командной строки; остальные аргументы передаются Qt"""
+    parser = argparse.ArgumentParser(description="Task Manager")
+    parser.add_argument("--profile", action="store_true",
+                        help="замер времени методов, журнал медленных запросов и отчет при выходе")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="порог медленного запроса в мс (по умолчанию 50)")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="сохранить профиль cProfile (pstats) при выходе")
+    parser.add_argument("--profile-report", metavar="FILE",
+                        help="сохранить отчет диагностики в файл")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="вывести время импорта и этапов запуска")
+    return parser.parse_known_args(argv)
+
+
+def watch_startup(timeline, window):
+    """Отметки первой отрисовки окна, первой страницы задач и заполнения кэша"""
+    from PyQt5.QtCore import QObject, QEvent
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                timeline.mark("первая отрисовка окна")
+                window.removeEventFilter(self)
+            return False
+
+    def report():
+        timeline.mark("кэш задач заполнен")
+        logger.info(f"Этапы запуска:\n{timeline.report()}")
+
+    paint_filter = FirstPaint(window)
+    window.installEventFilter(paint_filter)
+    window.data_loaded.connect(lambda: timeline.mark("первая страница задач"))
+    window.cache_ready.connect(report)
+
+
 def main():
     """Основная функция приложения"""
+    args, qt_args = parse_args(sys.argv[1:])
     try:
         from PyQt5.QtWidgets import QApplication, QMessageBox
-        from PyQt5.QtCore import QTimer, QSettings
+        from PyQt5.QtCore import QTimer
+        import instrumentation
+
+        timeline = None
+        if args.profile_startup:
+            timeline = instrumentation.StartupTimeline(STARTED_AT)
+            timeline.marks.append(("импорт PyQt5", QT_IMPORTED_AT))
+
         from ui.main_window import MainWindow
+        if timeline:
+            timeline.mark("импорт ui.main_window")
+
+        # Диагностика включается до создания окна и базы данных
+        if args.profile or args.cprofile:
+            instrumentation.enable(
+                slow_query_ms=args.slow_query_ms or instrumentation.DEFAULT_SLOW_QUERY_MS,
+                cprofile_path=args.cprofile,
+                report_path=args.profile_report
+            )
+        else:
+            instrumentation.enable_from_env()
 
         # Создание приложения
-        app = QApplication(sys.argv)
+        app = QApplication(sys.argv[:1] + qt_args)
         app.setApplicationName("Task Manager")
         app.setApplicationVersion("0.12.3")
         app.setOrganizationName("Task Industries")
@@ -46,23 +111,31 @@ def main():
         icon_path = Path(__file__).parent.parent / "resources" / "images" / "splash.png"
         if icon_path.exists():
             app.setWindowIcon(QIcon(str(icon_path)))
+        if timeline:
+            timeline.mark("QApplication")
 
-        # Создание главного окна
+        # Создание главного окна; данные загружаются в фоне после показа
         main_window = MainWindow()
+        if timeline:
+            timeline.mark("MainWindow()")
+            watch_startup(timeline, main_window)
 
         # Настройка запуска свернутым
-        settings = QSettings("SmartTodo", "TaskManager")
-        start_minimized = settings.value("start_minimized", False, type=bool)
+        start_minimized = main_window.settings.get("start_minimized")
 
         if not start_minimized:
             main_window.show()
         else:
             main_window.showMinimized()
+        if timeline:
+            timeline.mark("show()")
 
         logger.info("Приложение успешно запущено")
 
         # Запуск приложения
-        return app.exec_()
+        exit_code = app.exec_()
+        instrumentation.finish()
+        return exit_code
 
     except Exception as e:
         logger.critical(f"Ошибка запуска приложения: {e}")
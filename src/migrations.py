@@ -0,0 +1,417 @@
+import sqlite3
+import logging
+from typing import Callable, Iterator, List, NamedTuple, Optional
+from models import PRIORITY_CODES, STATUS_CODES, Priority, Status
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк обрабатывается за одну транзакцию в «тяжелых» миграциях
+MIGRATION_BATCH_SIZE = 5000
+
+ProgressCallback = Callable[[int, str], None]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    # Функция миграции: либо выполняется целиком, либо является генератором,
+    # и тогда после каждого yield изменения фиксируются отдельной транзакцией
+    apply: Callable[[sqlite3.Connection, int], Optional[Iterator[None]]]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Регистрация функции миграции схемы"""
+    def decorator(func):
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Текущая версия схемы (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    """Версия схемы после применения всех миграций"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def run_migrations(conn: sqlite3.Connection,
+                   batch_size: int = MIGRATION_BATCH_SIZE,
+                   progress_callback: Optional[ProgressCallback] = None) -> int:
+    """Применение всех еще не выполненных миграций.
+
+    Пакетные миграции фиксируются по частям, поэтому каждый их шаг должен быть
+    идемпотентным: после прерывания миграция начнется заново с той же версии.
+    """
+    current = get_schema_version(conn)
+    for m in MIGRATIONS:
+        if m.version <= current:
+            continue
+        logger.info(f"Applying migration {m.version}: {m.description}")
+        try:
+            steps = m.apply(conn, batch_size)
+            if steps is not None:
+                for _ in steps:
+                    conn.commit()
+                    if progress_callback:
+                        progress_callback(m.version, m.description)
+            conn.execute(f"PRAGMA user_version = {m.version}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Migration {m.version} failed: {e}")
+            raise
+        current = m.version
+        if progress_callback:
+            progress_callback(m.version, m.description)
+    return current
+
+
+@migration(1, "initial schema")
+def _initial_schema(conn: sqlite3.Connection, batch_size: int):
+    # Таблица категорий
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            color TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Таблица задач
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority TEXT NOT NULL,
+            status TEXT NOT NULL,
+            due_date TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            category_id INTEGER,
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+
+    # Создание начальных категорий
+    default_categories = [
+        ("Работа", "#FF6B6B"),
+        ("Личное", "#4ECDC4"),
+        ("Учеба", "#45B7D1"),
+        ("Покупки", "#96CEB4")
+    ]
+    conn.executemany(
+        "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)",
+        default_categories
+    )
+
+
+TASK_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_category_created ON tasks (category_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks (status, priority)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date)",
+]
+
+
+@migration(2, "secondary indexes on tasks")
+def _task_indexes(conn: sqlite3.Connection, batch_size: int):
+    # Каждый индекс строится отдельным шагом, чтобы не держать блокировку
+    # на все время миграции больших файлов
+    for statement in TASK_INDEXES:
+        conn.execute(statement)
+        yield
+    conn.execute("PRAGMA analysis_limit = 400")
+    conn.execute("ANALYZE")
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Проверка поддержки FTS5 в текущей сборке SQLite"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _id_batches(conn: sqlite3.Connection, table: str, batch_size: int) -> Iterator[tuple]:
+    """Диапазоны (lo, hi] идентификаторов таблицы по batch_size строк"""
+    last_id = 0
+    while True:
+        hi, count = conn.execute(
+            f"SELECT max(id), count(*) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size)
+        ).fetchone()
+        if not count:
+            return
+        yield last_id, hi
+        last_id = hi
+
+
+def _create_fts_triggers(conn: sqlite3.Connection):
+    """Триггеры синхронизации tasks_fts с таблицей tasks"""
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    ''')
+
+
+@migration(3, "full-text search index")
+def _full_text_search(conn: sqlite3.Connection, batch_size: int):
+    if not fts5_available(conn):
+        logger.warning("SQLite build has no FTS5, search will fall back to LIKE")
+        return
+
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content='tasks', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    _create_fts_triggers(conn)
+
+    # Индекс заполняется заново с нуля, поэтому прерванную миграцию можно повторить
+    conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('delete-all')")
+    yield
+    for lo, hi in _id_batches(conn, "tasks", batch_size):
+        conn.execute('''
+            INSERT INTO tasks_fts (rowid, title, description)
+            SELECT id, title, description FROM tasks WHERE id > ? AND id <= ?
+        ''', (lo, hi))
+        yield
+
+
+def _create_counter_triggers(conn: sqlite3.Connection):
+    """Триггеры поддержки счетчиков task_counters"""
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS task_counters_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_counters (category_id, status, priority, count)
+            VALUES (COALESCE(new.category_id, 0), new.status, new.priority, 1)
+            ON CONFLICT (category_id, status, priority) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS task_counters_ad AFTER DELETE ON tasks BEGIN
+            UPDATE task_counters SET count = count - 1
+            WHERE category_id = COALESCE(old.category_id, 0)
+              AND status = old.status AND priority = old.priority;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS task_counters_au
+        AFTER UPDATE OF status, priority, category_id ON tasks BEGIN
+            UPDATE task_counters SET count = count - 1
+            WHERE category_id = COALESCE(old.category_id, 0)
+              AND status = old.status AND priority = old.priority;
+            INSERT INTO task_counters (category_id, status, priority, count)
+            VALUES (COALESCE(new.category_id, 0), new.status, new.priority, 1)
+            ON CONFLICT (category_id, status, priority) DO UPDATE SET count = count + 1;
+        END
+    ''')
+
+
+@migration(4, "task counters")
+def _task_counters(conn: sqlite3.Connection, batch_size: int):
+    # Категория NULL хранится как 0, чтобы работал первичный ключ и UPSERT
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS task_counters (
+            category_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (category_id, status, priority)
+        ) WITHOUT ROWID
+    ''')
+    _create_counter_triggers(conn)
+    rebuild_task_counters(conn)
+
+
+def rebuild_task_counters(conn: sqlite3.Connection):
+    """Пересчет счетчиков задач по таблице tasks"""
+    conn.execute("DELETE FROM task_counters")
+    conn.execute('''
+        INSERT INTO task_counters (category_id, status, priority, count)
+        SELECT COALESCE(category_id, 0), status, priority, count(*)
+        FROM tasks
+        GROUP BY COALESCE(category_id, 0), status, priority
+    ''')
+
+
+def _enum_case(column: str, codes: dict, default: int) -> str:
+    """CASE-выражение, переводящее текстовое значение перечисления в код"""
+    branches = " ".join(f"WHEN '{member.value}' THEN {code}" for member, code in codes.items())
+    return f"CASE {column} {branches} ELSE {default} END"
+
+
+@migration(5, "compact task encoding")
+def _compact_encoding(conn: sqlite3.Connection, batch_size: int):
+    # Колонки priority/status объявлены как TEXT и приводили бы числа к строкам,
+    # поэтому таблица пересоздается с целочисленными колонками
+    conn.execute("DROP TABLE IF EXISTS tasks_new")
+    conn.execute('''
+        CREATE TABLE tasks_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            due_date INTEGER,
+            created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+            category_id INTEGER,
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+    yield
+
+    priority = _enum_case("priority", PRIORITY_CODES, PRIORITY_CODES[Priority.MEDIUM])
+    status = _enum_case("status", STATUS_CODES, STATUS_CODES[Status.PENDING])
+    for lo, hi in _id_batches(conn, "tasks", batch_size):
+        conn.execute(f'''
+            INSERT INTO tasks_new (id, title, description, priority, status, due_date, created_at, category_id)
+            SELECT id, title, description, {priority}, {status},
+                   CAST(strftime('%s', due_date) AS INTEGER),
+                   COALESCE(CAST(strftime('%s', created_at) AS INTEGER),
+                            CAST(strftime('%s', 'now') AS INTEGER)),
+                   category_id
+            FROM tasks WHERE id > ? AND id <= ?
+        ''', (lo, hi))
+        yield
+
+    # Замена таблицы, индексы и триггеры — одной транзакцией
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+    conn.execute("DROP TABLE tasks")
+    conn.execute("ALTER TABLE tasks_new RENAME TO tasks")
+    if row is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'tasks'", row)
+    for statement in TASK_INDEXES:
+        conn.execute(statement)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone():
+        _create_fts_triggers(conn)
+
+    conn.execute("DROP TABLE task_counters")
+    conn.execute('''
+        CREATE TABLE task_counters (
+            category_id INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            priority INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (category_id, status, priority)
+        ) WITHOUT ROWID
+    ''')
+    _create_counter_triggers(conn)
+    rebuild_task_counters(conn)
+    # Версия фиксируется вместе с заменой: повторный запуск по новой таблице недопустим
+    conn.execute("PRAGMA user_version = 5")
+    yield
+    conn.execute("VACUUM")
+
+
+@migration(6, "data version counter")
+def _data_version(conn: sqlite3.Connection, batch_size: int):
+    # Счетчик изменений, сохраняющийся между запусками (PRAGMA data_version действует
+    # только в пределах соединения); instance отличает базу от другой с тем же счетчиком
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            instance TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_version (id, instance) VALUES (1, lower(hex(randomblob(8))))")
+    for table in ("tasks", "categories"):
+        for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+                    UPDATE data_version SET version = version + 1;
+                END
+            ''')
+
+
+@migration(7, "recurring tasks")
+def _recurring_tasks(conn: sqlite3.Connection, batch_size: int):
+    # Правило повторения хранится один раз на серию (см. recurrence.py), due_date серии —
+    # ближайшее невыполненное повторение. Частичный индекс содержит только серии
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "recurrence" not in columns:
+        conn.execute("ALTER TABLE tasks ADD COLUMN recurrence TEXT")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_recurring ON tasks (due_date)
+        WHERE recurrence IS NOT NULL
+    ''')
+
+
+# Коды операций в журнале изменений change_log
+CHANGE_INSERT, CHANGE_UPDATE, CHANGE_DELETE = 0, 1, 2
+# Сущности журнала изменений
+CHANGE_TASK, CHANGE_CATEGORY = 0, 1
+
+
+@migration(8, "change log")
+def _change_log(conn: sqlite3.Connection, batch_size: int):
+    # Журнал изменений задач и категорий с монотонной версией (AUTOINCREMENT не выдает
+    # номера повторно). По нему другие экземпляры приложения забирают только изменившиеся
+    # строки. Счетчик data_version.version больше не ведется: версией базы служит
+    # последний номер журнала, а таблица data_version хранит только идентификатор базы
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity INTEGER NOT NULL,
+            row_id INTEGER NOT NULL,
+            op INTEGER NOT NULL
+        )
+    ''')
+    # Номера журнала продолжают прежний счетчик, чтобы сохраненные по нему снимки
+    # не совпали с версией уже измененной базы
+    conn.execute('''
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'change_log', version FROM data_version
+        WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'change_log')
+    ''')
+    for table, entity in (("tasks", CHANGE_TASK), ("categories", CHANGE_CATEGORY)):
+        for suffix, event, row, op in (("ai", "INSERT", "new", CHANGE_INSERT),
+                                       ("au", "UPDATE", "new", CHANGE_UPDATE),
+                                       ("ad", "DELETE", "old", CHANGE_DELETE)):
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_version_{suffix}")
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_changes_{suffix} AFTER {event} ON {table} BEGIN
+                    INSERT INTO change_log (entity, row_id, op) VALUES ({entity}, {row}.id, {op});
+                END
+            ''')
+
+
+@migration(9, "due date order index")
+def _due_order_index(conn: sqlite3.Connection, batch_size: int):
+    # Индекс по ключу сортировки TaskSort.DUE_DATE (выражение должно совпадать
+    # с ним дословно): без него страница по сроку — полный проход и сортировка
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_due_order ON tasks (IFNULL(due_date, 253402214400), id)"
+    )
+    conn.execute("PRAGMA analysis_limit = 400")
+    conn.execute("ANALYZE idx_tasks_due_order")
@@ -1,7 +1,7 @@
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 
 class Priority(Enum):
@@ -16,6 +16,47 @@ class Status(Enum):
     COMPLETED = "Завершено"
 
 
+# Компактное хранение в базе данных: перечисления записываются кодами,
+# даты и время — целым числом секунд Unix-времени (UTC)
+PRIORITIES = (Priority.LOW, Priority.MEDIUM, Priority.HIGH)
+STATUSES = (Status.PENDING, Status.IN_PROGRESS, Status.COMPLETED)
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_timestamp(value: Union[date, datetime, None]) -> Optional[int]:
+    """Дата или время (без часового пояса, UTC) в секунды Unix-времени"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return (value - _EPOCH) // timedelta(seconds=1)
+
+
+def decode_timestamp(value: Optional[int]) -> Optional[datetime]:
+    """Секунды Unix-времени в datetime без часового пояса (UTC)"""
+    if value is None:
+        return None
+    return _EPOCH + timedelta(seconds=value)
+
+
+def utc_now() -> datetime:
+    """Текущее время UTC с точностью до секунды, как его хранит база"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _slotted(cls):
+    """Пересоздание dataclass с __slots__ вместо __dict__ (slots=True до Python 3.10)"""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
 @dataclass
 class Task:
     id: Optional[int]
@@ -26,6 +67,69 @@ class Task:
     due_date: Optional[datetime]
     created_at: datetime
     category_id: Optional[int]
+    # Правило повторения (см. recurrence.py); у серии due_date — ближайшее невыполненное повторение
+    recurrence: Optional[str] = None
+
+
+def _lazy_timestamp(name: str) -> property:
+    """Поле TaskRecord: слот хранит секунды Unix-времени до первого обращения"""
+    slot = Task.__dict__[name]
+
+    def get(self):
+        value = slot.__get__(self)
+        if type(value) is int:
+            value = decode_timestamp(value)
+            slot.__set__(self, value)
+        return value
+
+    def set(self, value):
+        slot.__set__(self, value)
+
+    return property(get, set)
+
+
+class TaskRecord(Task):
+    """Задача, прочитанная из базы: даты декодируются при первом обращении.
+
+    Подходит везде, где ожидается Task; копии через dataclasses.replace — тоже TaskRecord.
+    Записи облегченных выборок списка содержат description=None: описание не загружено.
+    """
+    __slots__ = ()
+
+    due_date = _lazy_timestamp("due_date")
+    created_at = _lazy_timestamp("created_at")
+
+    @classmethod
+    def from_row(cls, row) -> "TaskRecord":
+        """Запись из строки (id, title, description, priority, status, due_date, created_at,
+        category_id, recurrence)"""
+        record = cls.__new__(cls)
+        record.id = row[0]
+        record.title = row[1]
+        record.description = row[2]
+        record.priority = PRIORITIES[row[3]]
+        record.status = STATUSES[row[4]]
+        record.due_date = row[5]
+        record.created_at = row[6]
+        record.category_id = row[7]
+        record.recurrence = row[8]
+        return record
+
+
+@_slotted
+@dataclass
+class ReminderTask:
+    """Поля задачи, по которым планируются напоминания (облегченная выборка)"""
+    id: int
+    title: str
+    due_date: Optional[datetime]
+    status: Status
+    recurrence: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row) -> "ReminderTask":
+        """Запись из строки (id, title, due_date, status, recurrence)"""
+        return cls(row[0], row[1], decode_timestamp(row[2]), STATUSES[row[3]], row[4])
 
 
 @dataclass
@@ -33,4 +137,27 @@ class Category:
     id: Optional[int]
     name: str
     color: str
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+
+@dataclass
+class TaskChange:
+    """Изменения задач после операции записи"""
+    inserted: List[Task] = field(default_factory=list)
+    updated: List[Task] = field(default_factory=list)
+    removed: List[Task] = field(default_factory=list)
+    # Состояние обновленных задач до изменения (по id)
+    previous: Dict[int, Task] = field(default_factory=dict)
+
+
+@dataclass
+class TaskStatistics:
+    """Количество задач по статусам, приоритетам и категориям"""
+    total: int = 0
+    by_status: Dict[Status, int] = field(default_factory=dict)
+    by_priority: Dict[Priority, int] = field(default_factory=dict)
+    by_category: Dict[Optional[int], int] = field(default_factory=dict)
+
+    @property
+    def completed(self) -> int:
+        return self.by_status.get(Status.COMPLETED, 0)
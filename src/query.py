@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import FrozenSet, Optional, Union
+
+from models import Task, Priority, Status
+
+
+def _as_date(value: Union[date, datetime, None]) -> Optional[date]:
+    """Срок задачи как date (в задачах встречаются и date, и datetime)"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class TaskSort(Enum):
+    # (выражение ключа сортировки, направление)
+    NEWEST = ("t.created_at", "DESC")
+    OLDEST = ("t.created_at", "ASC")
+    # Задачи без срока идут в конце (9999-12-31 в секундах Unix-времени)
+    DUE_DATE = ("IFNULL(t.due_date, 253402214400)", "ASC")
+    # Ранг bm25 полнотекстового поиска (меньше — релевантнее). Без текста поиска
+    # это NEWEST; без FTS5 база сортирует найденное по дате создания
+    RELEVANCE = ("r.rank", "ASC")
+
+    @property
+    def key(self) -> str:
+        return self.value[0]
+
+    @property
+    def direction(self) -> str:
+        return self.value[1]
+
+
+@dataclass(frozen=True)
+class TaskQuery:
+    """Составной фильтр списка задач; пустые поля не ограничивают выборку"""
+    category_id: Optional[int] = None
+    priorities: FrozenSet[Priority] = frozenset()
+    statuses: FrozenSet[Status] = frozenset()
+    text: str = ""
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+    sort: TaskSort = TaskSort.NEWEST
+
+    def __post_init__(self):
+        if self.sort is TaskSort.RELEVANCE and not self.text.strip():
+            object.__setattr__(self, "sort", TaskSort.NEWEST)
+
+    def shape(self) -> tuple:
+        """Форма запроса: от нее зависит текст SQL, но не параметры"""
+        return (
+            self.category_id is not None,
+            len(self.priorities),
+            len(self.statuses),
+            bool(self.text.strip()),
+            self.due_from is not None,
+            self.due_to is not None,
+            self.sort,
+        )
+
+    def matches(self, task: Task) -> bool:
+        """Проверка задачи без обращения к базе (текст сравнивается приближенно)"""
+        if self.category_id is not None and task.category_id != self.category_id:
+            return False
+        if self.priorities and task.priority not in self.priorities:
+            return False
+        if self.statuses and task.status not in self.statuses:
+            return False
+        if self.due_from is not None or self.due_to is not None:
+            due = _as_date(task.due_date)
+            if due is None:
+                return False
+            if self.due_from is not None and due < self.due_from:
+                return False
+            if self.due_to is not None and due > self.due_to:
+                return False
+        text = self.text.strip().lower()
+        # Без загруженного описания текст не проверить; такие задачи берутся из уже отфильтрованной выборки
+        if text and task.description is not None:
+            haystack = f"{task.title} {task.description or ''}".lower()
+            if not all(word in haystack for word in text.split()):
+                return False
+        return True
+
+    def sort_key(self, task: Task) -> tuple:
+        """Ключ сортировки задачи в Python, согласованный с ORDER BY запроса"""
+        if self.sort is TaskSort.DUE_DATE:
+            return _as_date(task.due_date) or date.max, task.id
+        if self.sort is TaskSort.RELEVANCE:
+            # Ранг считает только FTS5: загруженные строки не переставляются, новые идут в конец
+            return ()
+        return task.created_at, task.id
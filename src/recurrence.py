@@ -0,0 +1,224 @@
+import calendar
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Повторение задачи хранится в колонке tasks.recurrence одной строкой —
+# подмножеством правила RRULE (RFC 5545) с датой начала серии:
+#   FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;DTSTART=20261019;COUNT=10
+# Даты повторений не хранятся, а вычисляются генератором для нужного окна.
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+WEEKDAY_NAMES = ("пн", "вт", "ср", "чт", "пт", "сб", "вс")
+
+# Сколько периодов подряд без повторений допускается (например, 31-е число раз в два месяца)
+MAX_EMPTY_PERIODS = 100
+
+
+class Frequency(Enum):
+    DAILY = "Ежедневно"
+    WEEKLY = "Еженедельно"
+    MONTHLY = "Ежемесячно"
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y%m%d").date()
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """Правило повторения: частота, шаг и ограничения серии"""
+    frequency: Frequency
+    start: date
+    interval: int = 1
+    # Дни недели (0 — понедельник) для WEEKLY; пусто — день недели start
+    weekdays: Tuple[int, ...] = ()
+    # День месяца для MONTHLY; None — день start. Месяцы без этого дня пропускаются
+    month_day: Optional[int] = None
+    # Всего повторений в серии и последняя допустимая дата
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+    def __post_init__(self):
+        if self.interval < 1:
+            raise ValueError(f"Некорректный шаг повторения: {self.interval}")
+        if self.month_day is not None and not 1 <= self.month_day <= 31:
+            raise ValueError(f"Некорректный день месяца: {self.month_day}")
+        if self.count is not None and self.count < 1:
+            raise ValueError(f"Некорректное число повторений: {self.count}")
+        if any(not 0 <= day <= 6 for day in self.weekdays):
+            raise ValueError(f"Некорректные дни недели: {self.weekdays}")
+        object.__setattr__(self, "weekdays", tuple(sorted(set(self.weekdays))))
+
+    @classmethod
+    def parse(cls, text: str) -> "RecurrenceRule":
+        """Правило из строки колонки recurrence (ValueError для некорректной строки)"""
+        parts = {}
+        for part in text.strip().split(";"):
+            name, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"Некорректная часть правила повторения: {part!r}")
+            parts[name.strip().upper()] = value.strip()
+        if "FREQ" not in parts or "DTSTART" not in parts:
+            raise ValueError(f"В правиле повторения нет FREQ или DTSTART: {text!r}")
+        frequency = parts.pop("FREQ").upper()
+        if frequency not in Frequency.__members__:
+            raise ValueError(f"Неподдерживаемая частота повторения: {frequency}")
+        frequency = Frequency[frequency]
+        start = _parse_date(parts.pop("DTSTART"))
+        weekdays = ()
+        if "BYDAY" in parts:
+            weekdays = tuple(WEEKDAYS.index(day.upper()) for day in parts.pop("BYDAY").split(","))
+        month_day = parts.pop("BYMONTHDAY", None)
+        count = parts.pop("COUNT", None)
+        until = parts.pop("UNTIL", None)
+        interval = int(parts.pop("INTERVAL", 1))
+        if parts:
+            raise ValueError(f"Неподдерживаемые части правила повторения: {', '.join(parts)}")
+        return cls(
+            frequency=frequency,
+            start=start,
+            interval=interval,
+            weekdays=weekdays,
+            month_day=int(month_day) if month_day is not None else None,
+            count=int(count) if count is not None else None,
+            until=_parse_date(until) if until is not None else None,
+        )
+
+    def format(self) -> str:
+        """Строка для колонки recurrence"""
+        parts = [f"FREQ={self.frequency.name}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.weekdays:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.weekdays))
+        if self.month_day is not None:
+            parts.append(f"BYMONTHDAY={self.month_day}")
+        parts.append(f"DTSTART={self.start:%Y%m%d}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%d}")
+        return ";".join(parts)
+
+    def is_simple(self) -> bool:
+        """Правило без уточнений, которое задается одним пунктом списка повторений"""
+        return (self.interval == 1 and self.count is None and self.until is None
+                and self.weekdays in ((), (self.start.weekday(),))
+                and self.month_day in (None, self.start.day))
+
+    def describe(self) -> str:
+        """Описание правила для интерфейса"""
+        if self.frequency is Frequency.DAILY:
+            text = "каждый день" if self.interval == 1 else f"каждые {self.interval} дн."
+        elif self.frequency is Frequency.WEEKLY:
+            text = "каждую неделю" if self.interval == 1 else f"каждые {self.interval} нед."
+            days = self.weekdays or (self.start.weekday(),)
+            text += " (" + ", ".join(WEEKDAY_NAMES[day] for day in days) + ")"
+        else:
+            text = "каждый месяц" if self.interval == 1 else f"каждые {self.interval} мес."
+            text += f", {self.month_day or self.start.day}-го числа"
+        if self.count is not None:
+            text += f", {self.count} раз"
+        if self.until is not None:
+            text += f", до {self.until:%d.%m.%Y}"
+        return text
+
+    def _period(self, index: int) -> List[date]:
+        """Даты повторений периода с номером index (период — шаг правила от start)"""
+        if self.frequency is Frequency.DAILY:
+            return [self.start + timedelta(days=index * self.interval)]
+        if self.frequency is Frequency.WEEKLY:
+            monday = self.start - timedelta(days=self.start.weekday())
+            monday += timedelta(weeks=index * self.interval)
+            return [monday + timedelta(days=day) for day in self.weekdays or (self.start.weekday(),)]
+        month = self.start.month - 1 + index * self.interval
+        year, month = self.start.year + month // 12, month % 12 + 1
+        day = self.month_day or self.start.day
+        if day > calendar.monthrange(year, month)[1]:
+            return []
+        return [date(year, month, day)]
+
+    def _period_of(self, day: date) -> int:
+        """Номер периода, в который попадает дата (не меньше нуля)"""
+        if self.frequency is Frequency.DAILY:
+            index = (day - self.start).days // self.interval
+        elif self.frequency is Frequency.WEEKLY:
+            monday = self.start - timedelta(days=self.start.weekday())
+            index = (day - monday).days // 7 // self.interval
+        else:
+            index = ((day.year - self.start.year) * 12 + day.month - self.start.month) // self.interval
+        return max(0, index)
+
+    def occurrences(self, window_from: Optional[date] = None,
+                    window_to: Optional[date] = None) -> Iterator[date]:
+        """Даты повторений в окне [window_from, window_to] по возрастанию.
+
+        Генератор ленивый: бесконечная серия без window_to разворачивается
+        ровно настолько, сколько дат прочитает вызывающий. Без COUNT перебор
+        начинается сразу с периода window_from, а не с начала серии.
+        """
+        index = 0
+        if self.count is None and window_from is not None:
+            index = self._period_of(window_from)
+        produced = 0
+        empty = 0
+        while empty < MAX_EMPTY_PERIODS:
+            days = self._period(index)
+            empty = 0 if days else empty + 1
+            for day in days:
+                if day < self.start:
+                    continue
+                if ((self.count is not None and produced >= self.count)
+                        or (self.until is not None and day > self.until)
+                        or (window_to is not None and day > window_to)):
+                    return
+                produced += 1
+                if window_from is None or day >= window_from:
+                    yield day
+            index += 1
+
+    def first_on_or_after(self, day: date) -> Optional[date]:
+        """Первое повторение не раньше day; None, если серия закончилась"""
+        return next(self.occurrences(day), None)
+
+    def next_after(self, day: date) -> Optional[date]:
+        """Следующее повторение после day; None, если серия закончилась"""
+        return self.first_on_or_after(day + timedelta(days=1))
+
+
+@lru_cache(maxsize=1024)
+def parse_recurrence(text: Optional[str]) -> Optional[RecurrenceRule]:
+    """Правило задачи или None (для пустой или некорректной строки); разбор кэшируется"""
+    if not text:
+        return None
+    try:
+        return RecurrenceRule.parse(text)
+    except ValueError as e:
+        logger.warning(f"Некорректное правило повторения {text!r}: {e}")
+        return None
+
+
+def next_due_date(recurrence: Optional[str],
+                  due_date: Union[date, datetime, None]) -> Optional[date]:
+    """Срок серии после завершения ее текущего повторения (со сроком due_date).
+
+    None — серия закончилась или задача не повторяется. Одно и то же вычисление
+    используется и базой, и окном, поэтому оптимистичное обновление списка
+    совпадает с тем, что будет записано.
+    """
+    rule = parse_recurrence(recurrence)
+    if rule is None:
+        return None
+    if isinstance(due_date, datetime):
+        due_date = due_date.date()
+    if due_date is None:
+        due_date = rule.first_on_or_after(rule.start)
+        if due_date is None:
+            return None
+    return rule.next_after(due_date)
@@ -0,0 +1,191 @@
+import logging
+from dataclasses import replace
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from database import DatabaseManager
+from models import Task, TaskChange, Priority, Status
+from query import TaskQuery, TaskSort
+
+logger = logging.getLogger(__name__)
+
+# Запросы-образцы, задающие ключи двух упорядоченных индексов
+_CREATED_ORDER = TaskQuery(sort=TaskSort.NEWEST)
+_DUE_ORDER = TaskQuery(sort=TaskSort.DUE_DATE)
+
+
+class TaskRepository:
+    """Задачи в памяти с вторичными индексами поверх SQLite.
+
+    Запись в базу выполняет вызывающий (см. TaskWriter), а кэш обновляется
+    через apply_change и rekey; удаление категории записывается здесь же.
+    Изменения других процессов кэш получает так же, через apply_change
+    (см. ChangeWatcher): сам он базу не перечитывает.
+
+    Описания задач в памяти не хранятся: полная задача читается через DatabaseManager.get_task.
+
+    Полнотекстовый поиск и базы больше max_tasks обслуживаются напрямую из SQLite.
+    """
+
+    MAX_CACHED_TASKS = 200_000
+
+    def __init__(self, db: DatabaseManager, max_tasks: int = MAX_CACHED_TASKS):
+        self.db = db
+        self.max_tasks = max_tasks
+        self._cached = False
+        self._reset()
+
+    def _reset(self):
+        self._tasks: Dict[int, Task] = {}
+        self._by_status: Dict[Status, Set[int]] = {status: set() for status in Status}
+        self._by_priority: Dict[Priority, Set[int]] = {priority: set() for priority in Priority}
+        self._by_category: Dict[Optional[int], Set[int]] = {}
+        # Отсортированные ключи (значение, id) для сортировок и диапазонов
+        self._by_created: List[tuple] = []
+        self._by_due: List[tuple] = []
+        self._ordered_cache: Dict[TaskQuery, List[tuple]] = {}
+
+    def load(self):
+        """Полная загрузка задач и построение индексов"""
+        self._reset()
+        total = self.db.get_statistics().total
+        self._cached = total <= self.max_tasks
+        if not self._cached:
+            logger.info(f"Репозиторий работает без кэша: {total} задач")
+            return
+
+        for task in self.db.iter_query_tasks(TaskQuery(), summary=True):
+            self._index(task, bulk=True)
+        self._by_created.sort()
+        self._by_due.sort()
+        logger.info(f"В репозиторий загружено задач: {len(self._tasks)}")
+
+    def invalidate(self):
+        """Сброс кэша; до следующей загрузки запросы выполняются в базе"""
+        self._cached = False
+        self._reset()
+
+    def get(self, task_id: int) -> Optional[Task]:
+        """Задача из кэша по id"""
+        return self._tasks.get(task_id)
+
+    def query_tasks_page(self, query: TaskQuery, limit: int,
+                         cursor: Optional[tuple] = None) -> Tuple[List[Task], Optional[tuple]]:
+        """Страница задач по фильтру (без описаний); совместима с DatabaseManager.query_tasks_page"""
+        if query.text.strip() or not self._cached:
+            return self.db.query_tasks_page(query, limit, cursor, summary=True)
+
+        ordered = self._ordered(query)
+        if query.sort.direction == "DESC":
+            end = bisect_left(ordered, cursor) if cursor is not None else len(ordered)
+            keys = ordered[max(0, end - limit):end][::-1]
+        else:
+            start = bisect_right(ordered, cursor) if cursor is not None else 0
+            keys = ordered[start:start + limit]
+
+        tasks = [self._tasks[key[1]] for key in keys]
+        next_cursor = keys[-1] if limit and len(keys) == limit else None
+        return tasks, next_cursor
+
+    def apply_change(self, change: TaskChange):
+        """Применение изменений к кэшу без записи в базу (ее выполняет вызывающий)"""
+        if not self._cached:
+            return
+        for task in change.removed:
+            previous = self._tasks.get(task.id)
+            if previous is not None:
+                self._unindex(previous)
+        for task in change.updated:
+            previous = self._tasks.get(task.id)
+            if previous is not None:
+                self._unindex(previous)
+            self._index(replace(task, description=None))
+        for task in change.inserted:
+            # Задача могла попасть в кэш раньше: при загрузке или догоняющем применении
+            previous = self._tasks.get(task.id)
+            if previous is not None:
+                self._unindex(previous)
+            self._index(replace(task, description=None))
+        self._ordered_cache.clear()
+
+    def rekey(self, old_id: int, new_id: int):
+        """Замена временного id задачи на id, выданный базой"""
+        task = self._tasks.get(old_id)
+        if task is not None:
+            self._unindex(task)
+            # Записанная задача уже могла прийти из базы под постоянным id
+            stored = self._tasks.get(new_id)
+            if stored is not None:
+                self._unindex(stored)
+            self._index(replace(task, id=new_id))
+            # Упорядоченные выборки фильтров хранят id: прежний id в них больше не найдется
+            self._ordered_cache.clear()
+
+    def delete_category(self, category_id: int) -> bool:
+        """Удаление категории; ее задачи остаются без категории"""
+        success = self.db.delete_category(category_id)
+        if success and self._cached:
+            task_ids = self._by_category.pop(category_id, set())
+            for task_id in task_ids:
+                self._tasks[task_id].category_id = None
+            self._by_category.setdefault(None, set()).update(task_ids)
+            self._ordered_cache.clear()
+        return success
+
+    def _index(self, task: Task, bulk: bool = False):
+        self._tasks[task.id] = task
+        self._by_status[task.status].add(task.id)
+        self._by_priority[task.priority].add(task.id)
+        self._by_category.setdefault(task.category_id, set()).add(task.id)
+        if bulk:
+            self._by_created.append(_CREATED_ORDER.sort_key(task))
+            self._by_due.append(_DUE_ORDER.sort_key(task))
+        else:
+            insort(self._by_created, _CREATED_ORDER.sort_key(task))
+            insort(self._by_due, _DUE_ORDER.sort_key(task))
+
+    def _unindex(self, task: Task):
+        del self._tasks[task.id]
+        self._by_status[task.status].discard(task.id)
+        self._by_priority[task.priority].discard(task.id)
+        self._by_category.get(task.category_id, set()).discard(task.id)
+        for keys, key in ((self._by_created, _CREATED_ORDER.sort_key(task)),
+                          (self._by_due, _DUE_ORDER.sort_key(task))):
+            pos = bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                del keys[pos]
+
+    def _candidates(self, query: TaskQuery) -> Optional[Set[int]]:
+        """id задач, проходящих фильтр (None — фильтр ничего не ограничивает)"""
+        sets = []
+        if query.category_id is not None:
+            sets.append(self._by_category.get(query.category_id, set()))
+        if query.priorities:
+            sets.append(set().union(*(self._by_priority[p] for p in query.priorities)))
+        if query.statuses:
+            sets.append(set().union(*(self._by_status[s] for s in query.statuses)))
+        if query.due_from is not None or query.due_to is not None:
+            lo = bisect_left(self._by_due, (query.due_from or date.min,))
+            # Задачи без срока хранятся с ключом date.max и в диапазон не попадают
+            upper = query.due_to + timedelta(days=1) if query.due_to is not None else date.max
+            hi = bisect_left(self._by_due, (upper,))
+            sets.append({key[1] for key in self._by_due[lo:hi]})
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _ordered(self, query: TaskQuery) -> List[tuple]:
+        """Отсортированные ключи задач, проходящих фильтр"""
+        due_order = query.sort is TaskSort.DUE_DATE
+        candidates = self._candidates(query)
+        if candidates is None:
+            return self._by_due if due_order else self._by_created
+
+        ordered = self._ordered_cache.get(query)
+        if ordered is None:
+            order = _DUE_ORDER if due_order else _CREATED_ORDER
+            ordered = sorted(order.sort_key(self._tasks[task_id]) for task_id in candidates)
+            self._ordered_cache[query] = ordered
+        return ordered
@@ -0,0 +1,88 @@
+import logging
+from typing import Any, Dict, FrozenSet
+
+from PyQt5.QtCore import QObject, QSettings, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+ORGANIZATION = "SmartTodo"
+APPLICATION = "TaskManager"
+
+# Ключ -> значение по умолчанию; тип значения задает тип настройки
+DEFAULTS: Dict[str, Any] = {
+    "theme": "Светлая",
+    "language": "Русский",
+    "auto_save": False,
+    "start_minimized": False,
+    "confirm_deletion": True,
+    "sound_enabled": True,
+    "volume": 50,
+    "desktop_notifications": True,
+    "notification_timeout": 5,
+    "font_family": "Arial",
+    "font_size": 10,
+    "db_profile": "default",
+}
+
+
+class SettingsStore(QObject):
+    """Настройки приложения в памяти.
+
+    Все ключи читаются из QSettings один раз при создании, чтения обслуживаются из памяти.
+    update() меняет несколько ключей сразу: изменившиеся записываются одной пачкой,
+    о каждом сообщает changed, а об их наборе целиком — updated.
+    """
+    # ключ, новое значение
+    changed = pyqtSignal(str, object)
+    # набор изменившихся ключей одного обновления
+    updated = pyqtSignal(frozenset)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._qsettings = QSettings(ORGANIZATION, APPLICATION)
+        self._values = {key: self._read(key, default) for key, default in DEFAULTS.items()}
+
+    def _read(self, key: str, default):
+        try:
+            return self._qsettings.value(key, default, type=type(default))
+        except TypeError as e:
+            logger.warning(f"Некорректное значение настройки {key}: {e}")
+            return default
+
+    def get(self, key: str):
+        """Значение настройки (KeyError для неизвестного ключа)"""
+        return self._values[key]
+
+    def values(self) -> Dict[str, Any]:
+        """Копия всех настроек"""
+        return dict(self._values)
+
+    def update(self, values: Dict[str, Any]) -> FrozenSet[str]:
+        """Изменение настроек; возвращает ключи, значения которых действительно изменились"""
+        changed = {}
+        for key, value in values.items():
+            value = type(DEFAULTS[key])(value)
+            if self._values[key] != value:
+                changed[key] = value
+        if not changed:
+            return frozenset()
+
+        self._values.update(changed)
+        for key, value in changed.items():
+            self._qsettings.setValue(key, value)
+        self._qsettings.sync()
+
+        keys = frozenset(changed)
+        for key, value in changed.items():
+            self.changed.emit(key, value)
+        self.updated.emit(keys)
+        return keys
+
+    def set(self, key: str, value) -> bool:
+        """Изменение одной настройки"""
+        return bool(self.update({key: value}))
+
+    def reset(self) -> FrozenSet[str]:
+        """Сброс всех настроек к значениям по умолчанию"""
+        self._qsettings.clear()
+        return self.update(DEFAULTS)
@@ -0,0 +1,84 @@
+import os
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from models import (Task, TaskRecord, Category, PRIORITY_CODES, STATUS_CODES,
+                    encode_timestamp)
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файла: снимок другого формата просто не читается
+SNAPSHOT_FORMAT = 2
+
+
+@dataclass
+class Snapshot:
+    """Первая страница списка (без фильтров) и счетчики на момент выхода"""
+    # (идентификатор базы, счетчик изменений) — см. DatabaseManager.stored_version
+    version: Tuple[str, int]
+    page_size: int
+    tasks: List[Task] = field(default_factory=list)
+    cursor: Optional[tuple] = None
+    total: int = 0
+    completed: int = 0
+    categories: List[Category] = field(default_factory=list)
+
+
+def snapshot_path(db_path: str) -> Path:
+    """Файл снимка рядом с файлом базы"""
+    return Path(f"{db_path}.snapshot")
+
+
+def _task_row(task: Task) -> list:
+    # Порядок и кодирование полей — как в строках базы (см. TaskRecord.from_row), без описания
+    return [task.id, task.title, PRIORITY_CODES[task.priority], STATUS_CODES[task.status],
+            encode_timestamp(task.due_date), encode_timestamp(task.created_at), task.category_id,
+            task.recurrence]
+
+
+def save_snapshot(path: Path, snapshot: Snapshot):
+    """Запись снимка через временный файл: прерванная запись не портит прежний снимок"""
+    data = {
+        "format": SNAPSHOT_FORMAT,
+        "version": list(snapshot.version),
+        "page_size": snapshot.page_size,
+        "tasks": [_task_row(task) for task in snapshot.tasks],
+        "cursor": list(snapshot.cursor) if snapshot.cursor is not None else None,
+        "total": snapshot.total,
+        "completed": snapshot.completed,
+        "categories": [[c.id, c.name, c.color] for c in snapshot.categories],
+    }
+    temp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить снимок списка: {e}")
+
+
+def load_snapshot(path: Path) -> Optional[Snapshot]:
+    """Снимок с диска; None, если его нет или он не читается"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != SNAPSHOT_FORMAT:
+            return None
+        return Snapshot(
+            version=tuple(data["version"]),
+            page_size=data["page_size"],
+            tasks=[TaskRecord.from_row((row[0], row[1], None, *row[2:])) for row in data["tasks"]],
+            cursor=tuple(data["cursor"]) if data["cursor"] is not None else None,
+            total=data["total"],
+            completed=data["completed"],
+            categories=[Category(id=c[0], name=c[1], color=c[2], created_at=None)
+                        for c in data["categories"]],
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        logger.warning(f"Снимок списка не прочитан: {e}")
+        return None
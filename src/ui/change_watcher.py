@@ -0,0 +1,80 @@
+import sys
+import logging
+from pathlib import Path
+from typing import Optional
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+current_dir = Path(__file__).parent
+src_dir = current_dir.parent
+sys.path.insert(0, str(src_dir))
+
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeWatcher(QObject):
+    """Отслеживание изменений базы другими экземплярами приложения и скриптами.
+
+    Таймер раз в POLL_INTERVAL_MS сравнивает PRAGMA data_version основного соединения —
+    это не чтение таблиц, а счетчик коммитов других соединений. Только когда он изменился,
+    из журнала change_log забираются записи после последней просмотренной версии
+    и читаются изменившиеся задачи.
+    """
+    # ChangeSet, прочитанные задачи (вставленные и измененные, без описаний)
+    changed = pyqtSignal(object, list)
+    # Журнал не покрывает пропущенные изменения или их слишком много: нужна полная перезагрузка
+    reload_needed = pyqtSignal()
+
+    POLL_INTERVAL_MS = 500
+    # Больше изменений за раз дешевле перечитать целиком
+    MAX_CHANGES = 5000
+
+    def __init__(self, parent=None, interval_ms: int = POLL_INTERVAL_MS):
+        super().__init__(parent)
+        self.db: Optional[DatabaseManager] = None
+        self.version = 0
+        self._data_version: Optional[int] = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.poll)
+
+    def start(self, db: DatabaseManager, version: int):
+        """Начало отслеживания изменений после версии базы version (см. stored_version)"""
+        self.db = db
+        self.version = version
+        self._data_version = None
+        self._timer.start()
+
+    def reset(self):
+        """Пропуск накопившихся изменений перед полной перезагрузкой данных"""
+        if self.db is not None:
+            self._data_version = self.db.data_version()
+            self.version = self.db.stored_version()[1]
+
+    def stop(self):
+        self._timer.stop()
+
+    def poll(self):
+        """Проверка изменений; без коммитов других соединений стоит одного PRAGMA"""
+        try:
+            data_version = self.db.data_version()
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            changes = self.db.pull_changes(self.version, self.MAX_CHANGES)
+            if not changes.complete:
+                logger.info("Изменений в базе слишком много для точечного обновления")
+                self.reset()
+                self.reload_needed.emit()
+                return
+            self.version = changes.version
+            if not changes:
+                return
+            tasks = self.db.get_tasks_by_ids(changes.inserted | changes.updated, summary=True)
+            logger.info(f"Изменения из базы: добавлено {len(changes.inserted)}, "
+                        f"изменено {len(changes.updated)}, удалено {len(changes.removed)}")
+            self.changed.emit(changes, tasks)
+        except Exception as e:
+            logger.error(f"Ошибка проверки изменений базы: {e}")
@@ -2,44 +2,214 @@ import os
 import sys
 import logging
 from pathlib import Path
+from dataclasses import replace
 from datetime import datetime
+from functools import partial
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QListWidget, QLabel, QLineEdit,
+                             QPushButton, QListWidget, QListView, QLabel, QLineEdit,
                              QComboBox, QMessageBox, QShortcut, QListWidgetItem,
-                             QMenu, QAction, QInputDialog, QProgressBar, QApplication, QDialog)
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QDate, QSettings
-from PyQt5.QtGui import QKeySequence, QPixmap, QIcon, QPainter, QColor, QFont
-from PyQt5.QtMultimedia import QSound
+                             QMenu, QAction, QInputDialog, QProgressBar, QApplication, QDialog,
+                             QAbstractItemView, QSystemTrayIcon, QStyle)
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QDate
+from PyQt5.QtGui import QKeySequence, QPixmap, QIcon, QPainter, QFont
 
 # Правильные пути для импорта
 current_dir = Path(__file__).parent
 src_dir = current_dir.parent
 sys.path.insert(0, str(src_dir))
 
-from database import DatabaseManager
-from models import Task, Category, Priority, Status
+from database import DEFAULT_DB_PATH, PERFORMANCE_PROFILES
+from models import Task, TaskChange, Category, Priority, Status, utc_now
+from query import TaskQuery, TaskSort
+from recurrence import next_due_date
+from repository import TaskRepository
+from settings_store import SettingsStore
+from snapshot import Snapshot, snapshot_path, load_snapshot, save_snapshot
+from ui.change_watcher import ChangeWatcher
+from ui.notification_sound import NotificationSound
+from ui.reminders import ReminderScheduler, REMINDED_STATUSES
+from ui.search_controller import SearchController
+from ui.startup_loader import StartupLoader
+from ui.task_model import TaskListModel
+from ui.task_writer import TaskWriter
 
 logger = logging.getLogger(__name__)
 
+# Сколько названий задач показывать в одном уведомлении о сроках
+REMINDER_TITLES_SHOWN = 5
+# Сколько ждать записи очереди при закрытии, прежде чем предупредить пользователя
+WRITER_SHUTDOWN_NOTICE_S = 2.0
+
 
 class MainWindow(QMainWindow):
     task_double_clicked = pyqtSignal(Task)
+    # Первая страница задач показана; кэш задач в памяти заполнен
+    data_loaded = pyqtSignal()
+    cache_ready = pyqtSignal()
 
     def __init__(self):
         super().__init__()
-        self.db = DatabaseManager()
-        self.current_filter = "all"
-        self.current_tasks = []
-        self.settings = QSettings("SmartTodo", "TaskManager")
+        self.settings = SettingsStore(self)
+        self.settings.updated.connect(self.on_settings_changed)
+        db_profile = self.settings.get("db_profile")
+        if db_profile not in PERFORMANCE_PROFILES:
+            db_profile = "default"
+        # База открывается в фоне после показа окна (см. on_database_opened)
+        self.db = None
+        self.repository = None
+        self.writer = None
+        self.cache_warm = False
+        self.closing = False
+        self.loader = StartupLoader(self)
+        self.loader.signals.opened.connect(self.on_database_opened)
+        self.loader.signals.warmed.connect(self.on_cache_warmed)
+        self.loader.signals.reminders.connect(self.on_reminders_loaded)
+        self.loader.signals.failed.connect(self.on_database_failed)
+        # Номер команды записи -> обработчик ее результата
+        self.pending_writes = {}
+        self.sound = NotificationSound(self)
+        self.reminders = ReminderScheduler(self)
+        self.reminders.due.connect(self.on_reminders_due)
+        # Изменения базы другими экземплярами приложения и скриптами
+        self.watcher = ChangeWatcher(self)
+        self.watcher.changed.connect(self.on_external_changes)
+        self.watcher.reload_needed.connect(self.refresh_tasks)
+        # Значок в области уведомлений создается при первом напоминании
+        self.tray_icon = None
+        # Текущее представление списка: категория, фильтры, поиск и сортировка
+        self.current_category_id = None
+        self.current_query = TaskQuery()
+        self.stats_total = 0
+        self.stats_completed = 0
+        self.search_controller = SearchController(self.search_first_page, self)
+        self.search_controller.results_ready.connect(self.on_search_results)
+        self.search_controller.cleared.connect(self.refresh_view)
         self.setup_ui()
-        self.setup_shortcuts()
-        self.load_tasks()
-        self.load_categories()
 
         # Инициализация настроек
         self.apply_settings()
 
+        # До загрузки данных список и кнопки недоступны
+        self.centralWidget().setEnabled(False)
+        self.snapshot = self.show_snapshot()
+        if self.snapshot is None:
+            self.total_label.setText("Загрузка задач...")
+        self.loader.open(db_profile, self.task_model.page_size,
+                         self.snapshot.version if self.snapshot else None)
+
+    def show_snapshot(self):
+        """Отрисовка списка из снимка, сохраненного при прошлом выходе"""
+        snapshot = load_snapshot(snapshot_path(DEFAULT_DB_PATH))
+        if snapshot is None or snapshot.page_size != self.task_model.page_size:
+            return None
+        self.task_model.set_tasks(snapshot.tasks)
+        self.stats_total = snapshot.total
+        self.stats_completed = snapshot.completed
+        self.show_statistics()
+        self.load_categories(snapshot.categories)
+        return snapshot
+
+    def write_snapshot(self):
+        """Сохранение первой страницы списка и счетчиков для следующего запуска"""
+        page_size = self.task_model.page_size
+        version = self.db.stored_version()
+        tasks, cursor = self.db.query_tasks_page(TaskQuery(), page_size, summary=True)
+        stats = self.db.get_statistics()
+        # Снимок, на который пришлось изменение другого процесса, не сохраняется
+        if not version[0] or self.db.stored_version() != version:
+            snapshot_path(DEFAULT_DB_PATH).unlink(missing_ok=True)
+            return
+        save_snapshot(snapshot_path(DEFAULT_DB_PATH), Snapshot(
+            version=version,
+            page_size=page_size,
+            tasks=tasks,
+            cursor=cursor,
+            total=stats.total,
+            completed=stats.completed,
+            categories=self.db.get_categories()
+        ))
+
+    def on_database_opened(self, db, first_page):
+        """База открыта: показ первой страницы (или проверенного снимка), затем фоновое заполнение кэша"""
+        if self.closing:
+            return
+        if first_page is None:
+            first_page = (self.snapshot.tasks, self.snapshot.cursor)
+        elif self.snapshot is not None:
+            logger.info("Снимок списка устарел, список обновлен из базы")
+        self.snapshot = None
+        self.db = db
+        self.repository = TaskRepository(self.db)
+        # Запись идет в фоне; список меняется сразу, не дожидаясь коммита
+        self.writer = TaskWriter(self.db, self)
+        self.writer.finished.connect(self.on_write_finished)
+        self.writer.failed.connect(self.on_write_failed)
+
+        self.current_query = self.build_query()
+        self.task_model.set_fetcher(self.page_fetcher(self.current_query), first_page)
+        self.update_statistics()
+        self.load_categories()
+        self.setup_shortcuts()
+        self.centralWidget().setEnabled(True)
+        self.data_loaded.emit()
+        if self.sound.enabled:
+            self.sound.preload()
+        # Напоминания читаются в фоне раньше кэша задач: они нужнее и загружаются быстрее
+        self.load_reminders()
+        # Версия прочитана до первой страницы: все, что изменится позже, придет через журнал
+        self.watcher.start(self.db, self.loader.version[1])
+        self.warm_up_cache()
+
+    def on_database_failed(self, message):
+        """База не открылась: работа без нее невозможна"""
+        if self.closing:
+            return
+        logger.critical(f"Ошибка открытия базы данных: {message}")
+        QMessageBox.critical(self, "Ошибка запуска", f"Не удалось открыть базу данных:\n{message}")
+        self.close()
+
+    def warm_up_cache(self):
+        """Фоновое заполнение кэша задач в памяти"""
+        self.loader.warm_up(self.db)
+
+    def on_cache_warmed(self, repository, version):
+        """Кэш загружен в фоне: он догоняет базу и подменяет прежний.
+
+        Изменения после версии version, и чужие, и свои, читаются из журнала;
+        поверх них применяются оптимистичные изменения, еще не записанные в базу.
+        """
+        if self.closing:
+            return
+        changes = self.db.pull_changes(version, ChangeWatcher.MAX_CHANGES, include_own=True)
+        if not changes.complete:
+            logger.info("Во время загрузки кэша изменений было слишком много, загрузка повторяется")
+            self.warm_up_cache()
+            return
+        tasks = self.db.get_tasks_by_ids(changes.inserted | changes.updated, summary=True)
+        found = {task.id for task in tasks}
+        removed_ids = changes.removed | ((changes.inserted | changes.updated) - found)
+        repository.apply_change(TaskChange(
+            inserted=[task for task in tasks if task.id in changes.inserted],
+            updated=[task for task in tasks if task.id not in changes.inserted],
+            removed=[task for task in map(repository.get, removed_ids) if task is not None]
+        ))
+        # Одно изменение может относиться к нескольким командам записи
+        pending = {id(change): change for _, change in self.pending_writes.values()}
+        for change in pending.values():
+            repository.apply_change(change)
+        logger.info(f"Кэш догнал базу: изменений в журнале {len(found | removed_ids)}, "
+                    f"незаписанных {len(pending)}")
+        self.repository = repository
+        self.cache_warm = True
+        self.cache_ready.emit()
+
+    def page_fetcher(self, query):
+        """Источник страниц списка: кэш в памяти или, пока он не заполнен, сама база"""
+        if self.cache_warm:
+            return partial(self.repository.query_tasks_page, query)
+        return partial(self.db.query_tasks_page, query, summary=True)
+
     def setup_ui(self):
         """Настройка пользовательского интерфейса"""
         self.setWindowTitle("Task Manager")
@@ -83,6 +253,15 @@ class MainWindow(QMainWindow):
         self.status_filter.currentTextChanged.connect(self.filter_tasks)
         filter_layout.addWidget(self.status_filter)
 
+        self.sort_combo = QComboBox()
+        # Без текста поиска релевантность совпадает с порядком "Сначала новые"
+        self.sort_combo.addItem("По релевантности", TaskSort.RELEVANCE)
+        self.sort_combo.addItem("Сначала новые", TaskSort.NEWEST)
+        self.sort_combo.addItem("Сначала старые", TaskSort.OLDEST)
+        self.sort_combo.addItem("По сроку", TaskSort.DUE_DATE)
+        self.sort_combo.currentIndexChanged.connect(self.filter_tasks)
+        filter_layout.addWidget(self.sort_combo)
+
         main_layout.addLayout(filter_layout)
 
         # Статистика
@@ -130,8 +309,12 @@ class MainWindow(QMainWindow):
         tasks_label.setStyleSheet("font-weight: bold;")
         tasks_layout.addWidget(tasks_label)
 
-        self.tasks_list = QListWidget()
-        self.tasks_list.itemDoubleClicked.connect(self.on_task_double_clicked)
+        self.task_model = TaskListModel(self)
+        self.tasks_list = QListView()
+        self.tasks_list.setModel(self.task_model)
+        self.tasks_list.setUniformItemSizes(True)
+        self.tasks_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.tasks_list.doubleClicked.connect(self.on_task_double_clicked)
         self.tasks_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tasks_list.customContextMenuRequested.connect(self.show_context_menu)
         tasks_layout.addWidget(self.tasks_list)
@@ -166,6 +349,8 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+N"), self).activated.connect(self.add_task)
         QShortcut(QKeySequence("Ctrl+E"), self).activated.connect(self.edit_task)
         QShortcut(QKeySequence("Delete"), self).activated.connect(self.delete_task)
+        QShortcut(QKeySequence("Ctrl+Return"), self).activated.connect(self.complete_task)
+        QShortcut(QKeySequence("Ctrl+M"), self).activated.connect(self.choose_category_for_tasks)
         QShortcut(QKeySequence("Ctrl+F"), self).activated.connect(self.focus_search)
         QShortcut(QKeySequence("Ctrl+S"), self).activated.connect(self.open_settings)
         QShortcut(QKeySequence("F5"), self).activated.connect(self.refresh_tasks)
@@ -176,81 +361,107 @@ class MainWindow(QMainWindow):
         logger.info("Фокус на поле поиска (Ctrl+F)")
 
     def refresh_tasks(self):
-        """Обновление списка задач"""
+        """Обновление списка задач: список читается из базы, кэш перезагружается в фоне"""
+        self.watcher.reset()
+        self.cache_warm = False
+        self.repository.invalidate()
         self.load_tasks()
+        self.load_reminders()
+        self.warm_up_cache()
         logger.info("Список задач обновлен (F5)")
 
+    def build_query(self):
+        """Составной фильтр из состояния элементов управления"""
+        priority_filter = self.priority_filter.currentText()
+        status_filter = self.status_filter.currentText()
+        return TaskQuery(
+            category_id=self.current_category_id,
+            priorities=frozenset(p for p in Priority if p.value == priority_filter),
+            statuses=frozenset(s for s in Status if s.value == status_filter),
+            text=self.search_input.text().strip(),
+            sort=self.sort_combo.currentData() or TaskSort.NEWEST
+        )
+
+    def refresh_view(self):
+        """Перезапрос списка задач по текущему фильтру (страницы подгружаются при прокрутке)"""
+        try:
+            self.current_query = self.build_query()
+            self.task_model.set_fetcher(self.page_fetcher(self.current_query),
+                                        tooltips=self.search_tooltips(self.current_query))
+        except Exception as e:
+            logger.error(f"Ошибка загрузки задач: {e}")
+
     def search_tasks(self, text):
-        """Поиск задач"""
+        """Поиск задач (запрос выполняется в фоне после паузы во вводе)"""
         try:
-            if text.strip():
-                tasks = self.db.search_tasks(text.strip())
-                self.display_tasks(tasks)
-            else:
-                self.load_tasks()
+            self.current_query = self.build_query()
+            self.search_controller.set_text(text)
         except Exception as e:
             logger.error(f"Ошибка поиска задач: {e}")
 
-    def filter_tasks(self):
-        """Фильтрация задач по приоритету и статусу"""
+    def search_first_page(self, text):
+        """Первая страница поиска; выполняется в пуле потоков"""
+        query = replace(self.current_query, text=text)
+        return query, self.db.query_tasks_page(query, self.task_model.page_size, summary=True)
+
+    def search_tooltips(self, query):
+        """Подсказки строк с найденными фрагментами текста; без поиска — None"""
+        text = query.text.strip()
+        if not text:
+            return None
+        return partial(self.search_snippet, text)
+
+    def search_snippet(self, text, task_id):
+        """Заголовок и фрагмент описания задачи с выделенными совпадениями"""
+        snippet = self.db.search_snippets(text, [task_id]).get(task_id)
+        if snippet is None:
+            return None
+        title, fragment = snippet
+        return f"<qt>{title}<br>{fragment}</qt>" if fragment else f"<qt>{title}</qt>"
+
+    def on_search_results(self, text, result):
+        """Отображение результатов последнего поискового запроса"""
         try:
-            priority_filter = self.priority_filter.currentText()
-            status_filter = self.status_filter.currentText()
-
-            filtered_tasks = self.current_tasks.copy()
-
-            # Фильтрация по приоритету
-            if priority_filter != "Все приоритеты":
-                filtered_tasks = [t for t in filtered_tasks if t.priority.value == priority_filter]
-
-            # Фильтрация по статусу
-            if status_filter != "Все статусы":
-                filtered_tasks = [t for t in filtered_tasks if t.status.value == status_filter]
-
-            self.display_tasks(filtered_tasks)
+            query, first_page = result
+            # Пока шел запрос, могли смениться другие фильтры
+            if query != self.current_query:
+                return
+            self.task_model.set_fetcher(self.page_fetcher(query), first_page,
+                                        self.search_tooltips(query))
         except Exception as e:
-            logger.error(f"Ошибка фильтрации задач: {e}")
+            logger.error(f"Ошибка отображения результатов поиска: {e}")
+
+    def current_task(self):
+        """Задача, выбранная в списке"""
+        index = self.tasks_list.currentIndex()
+        if not index.isValid():
+            return None
+        return self.task_model.task_at(index.row())
+
+    def selected_tasks(self):
+        """Задачи, выделенные в списке (в порядке строк); без выделения — текущая"""
+        rows = sorted(index.row() for index in self.tasks_list.selectionModel().selectedIndexes())
+        tasks = [task for task in map(self.task_model.task_at, rows) if task is not None]
+        if not tasks:
+            task = self.current_task()
+            if task:
+                tasks = [task]
+        return tasks
+
+    def filter_tasks(self):
+        """Фильтрация задач по приоритету, статусу и сортировка"""
+        self.refresh_view()
 
     def load_tasks(self):
-        """Загрузка задач из базы данных"""
+        """Загрузка задач из базы данных (страницы подгружаются при прокрутке)"""
         try:
-            self.tasks_list.clear()
-            self.current_tasks = self.db.get_all_tasks()
-
-            for task in self.current_tasks:
-                item = QListWidgetItem()
-
-                # Форматирование текста задачи
-                status_icon = "✓" if task.status == Status.COMPLETED else "○"
-                priority_color = {
-                    Priority.LOW: "🟢",
-                    Priority.MEDIUM: "🟡",
-                    Priority.HIGH: "🔴"
-                }
-
-                item_text = f"{status_icon} {task.title} {priority_color[task.priority]}"
-                if task.due_date:
-                    item_text += f" 📅 {task.due_date.strftime('%d.%m.%Y')}"
-
-                item.setText(item_text)
-                item.setData(Qt.UserRole, task)
-
-                # Установка цвета в зависимости от статуса
-                if task.status == Status.COMPLETED:
-                    item.setBackground(QColor("#d4edda"))
-                elif task.priority == Priority.HIGH:
-                    item.setBackground(QColor("#f8d7da"))
-                elif task.priority == Priority.MEDIUM:
-                    item.setBackground(QColor("#fff3cd"))
-
-                self.tasks_list.addItem(item)
-
+            self.refresh_view()
             self.update_statistics()
         except Exception as e:
             logger.error(f"Ошибка загрузки задач: {e}")
 
-    def load_categories(self):
-        """Загрузка категорий"""
+    def load_categories(self, categories=None):
+        """Загрузка категорий (categories — уже прочитанный список, например из снимка)"""
         try:
             self.category_list.clear()
 
@@ -259,7 +470,8 @@ class MainWindow(QMainWindow):
             all_item.setData(Qt.UserRole, "all")
             self.category_list.addItem(all_item)
 
-            categories = self.db.get_categories()
+            if categories is None:
+                categories = self.db.get_categories()
             for category in categories:
                 item = QListWidgetItem(f"📁 {category.name}")
                 item.setData(Qt.UserRole, category.id)
@@ -271,34 +483,161 @@ class MainWindow(QMainWindow):
         """Обработка выбора категории"""
         try:
             category_data = item.data(Qt.UserRole)
-            if category_data == "all":
-                self.current_filter = "all"
-                self.load_tasks()
-            else:
-                self.current_filter = f"category_{category_data}"
-                tasks = self.db.get_tasks_by_category(category_data)
-                self.display_tasks(tasks)
+            self.current_category_id = None if category_data == "all" else category_data
+            self.refresh_view()
         except Exception as e:
             logger.error(f"Ошибка выбора категории: {e}")
 
-    def display_tasks(self, tasks):
-        """Отображение списка задач"""
+    def apply_change(self, change, recount=False, text_matches=None):
+        """Точечное обновление кэша, списка и счетчиков после изменения задач.
+
+        recount — прежнее состояние задач известно не полностью (изменения из базы),
+        и счетчики перечитываются из базы. text_matches — id задач, найденных
+        текущим поиском по базе (см. TaskListModel.apply_change).
+        """
         try:
-            self.tasks_list.clear()
-            self.current_tasks = tasks
-            for task in tasks:
-                item = QListWidgetItem(task.title)
-                item.setData(Qt.UserRole, task)
-                self.tasks_list.addItem(item)
+            self.repository.apply_change(change)
+            self.task_model.apply_change(change, self.current_query, text_matches)
+            self.reminders.apply_change(change)
+
+            if recount:
+                self.update_statistics()
+                return
+            self.stats_total += len(change.inserted) - len(change.removed)
+            self.stats_completed += sum(1 for t in change.inserted if t.status == Status.COMPLETED)
+            self.stats_completed -= sum(1 for t in change.removed if t.status == Status.COMPLETED)
+            for task in change.updated:
+                was_completed = change.previous[task.id].status == Status.COMPLETED
+                self.stats_completed += (task.status == Status.COMPLETED) - was_completed
+            self.show_statistics()
         except Exception as e:
-            logger.error(f"Ошибка отображения задач: {e}")
+            logger.error(f"Ошибка обновления списка задач: {e}")
+            self.load_tasks()
 
+    def submit_write(self, ticket, change, on_done=None):
+        """Учет поставленной в очередь команды записи и ее оптимистичного изменения change"""
+        self.pending_writes[ticket] = (on_done, change)
+
+    def on_write_finished(self, ticket, result):
+        """Команда записи зафиксирована в базе"""
+        on_done, _ = self.pending_writes.pop(ticket, (None, None))
+        if not result:
+            # Задачи уже удалены или изменены в другом месте
+            self.on_write_failed(ticket, "задачи не найдены в базе")
+            return
+        if on_done is not None:
+            on_done(result)
+
+    def on_write_failed(self, ticket, message):
+        """Откат оптимистичных изменений: список перечитывается из базы"""
+        self.pending_writes.pop(ticket, None)
+        logger.error(f"Изменения не сохранены: {message}")
+        self.refresh_tasks()
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить изменения: {message}")
+
+    def on_external_changes(self, changes, tasks):
+        """Точечное применение изменений, внесенных в базу другим процессом"""
+        if self.closing:
+            return
+        found = {task.id: task for task in tasks}
+        # Задача, удаленная после чтения журнала, тоже считается удаленной
+        removed_ids = changes.removed | ((changes.inserted | changes.updated) - found.keys())
+        previous = {}
+        for task_id in (*found, *removed_ids):
+            task = self.repository.get(task_id)
+            if task is None:
+                row = self.task_model.row_of(task_id)
+                task = self.task_model.task_at(row) if row is not None else None
+            if task is not None:
+                previous[task_id] = task
+        # Уже известная задача (например, кэш перечитан раньше опроса) обновляется, а не добавляется
+        change = TaskChange(
+            inserted=[task for task in tasks if task.id not in previous],
+            updated=[task for task in tasks if task.id in previous],
+            removed=[previous[task_id] for task_id in removed_ids if task_id in previous],
+            previous=previous
+        )
+        # Задачи из журнала прочитаны без описаний: попадание в поиск решает база
+        text = self.current_query.text.strip()
+        text_matches = self.db.search_task_ids(text, found) if text else None
+        self.apply_change(change, recount=True, text_matches=text_matches)
+        if changes.categories_changed:
+            self.load_categories()
+
+    def on_task_added(self, temp_id, task_id):
+        """Замена временного id новой задачи на выданный базой"""
+        self.repository.rekey(temp_id, task_id)
+        self.task_model.rekey(temp_id, task_id)
+        self.reminders.rekey(temp_id, task_id)
+
+    def on_occurrences_completed(self, results):
+        """Выполненные повторения записаны: временные id заменяются на выданные базой"""
+        for temp_id, task_id in results:
+            if temp_id is not None and task_id is not None:
+                self.on_task_added(temp_id, task_id)
+
+    def load_reminders(self):
+        """Фоновая загрузка предстоящих сроков задач в планировщик напоминаний"""
+        if self.closing:
+            return
+        self.reminders.begin_load()
+        self.loader.load_reminders(self.db, REMINDED_STATUSES, self.reminders.plan)
+
+    def on_reminders_loaded(self, plan):
+        """План напоминаний построен в фоне; изменения за время загрузки применяются поверх"""
+        if self.closing:
+            return
+        if plan is None:
+            self.reminders.cancel_load()
+            return
+        self.reminders.load(plan)
+
+    def on_reminders_due(self, items):
+        """Одно уведомление обо всех задачах, срок которых наступил"""
+        if not self.settings.get("desktop_notifications"):
+            return
+        titles = [title for _, title in items]
+        if len(titles) == 1:
+            message = f"Сегодня срок задачи «{titles[0]}»"
+        else:
+            shown = REMINDER_TITLES_SHOWN
+            message = f"Сегодня срок задач: {len(titles)}\n" + "\n".join(titles[:shown])
+            if len(titles) > shown:
+                message += "\n…"
+        self.show_desktop_notification("Напоминание о сроке", message)
+        self.play_notification_sound()
+
+    def show_desktop_notification(self, title, message):
+        """Уведомление на рабочем столе на notification_timeout секунд"""
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            # Без области уведомлений окно хотя бы привлекает внимание на панели задач
+            QApplication.alert(self)
+            logger.info(f"{title}: {message}")
+            return
+        if self.tray_icon is None:
+            icon = self.windowIcon()
+            if icon.isNull():
+                icon = self.style().standardIcon(QStyle.SP_MessageBoxInformation)
+            self.tray_icon = QSystemTrayIcon(icon, self)
+            self.tray_icon.activated.connect(lambda _: self.showNormal())
+        self.tray_icon.show()
+        self.tray_icon.showMessage(title, message, QSystemTrayIcon.Information,
+                                   self.settings.get("notification_timeout") * 1000)
     def update_statistics(self):
         """Обновление статистики"""
         try:
-            tasks = self.db.get_all_tasks()
-            total = len(tasks)
-            completed = len([t for t in tasks if t.status == Status.COMPLETED])
+            stats = self.db.get_statistics()
+            self.stats_total = stats.total
+            self.stats_completed = stats.completed
+            self.show_statistics()
+        except Exception as e:
+            logger.error(f"Ошибка обновления статистики: {e}")
+
+    def show_statistics(self):
+        """Отображение счетчиков задач"""
+        try:
+            total = self.stats_total
+            completed = self.stats_completed
 
             self.total_label.setText(f"Всего задач: {total}")
             self.completed_label.setText(f"Завершено: {completed}")
@@ -317,17 +656,20 @@ class MainWindow(QMainWindow):
             if dialog.exec_() == QDialog.Accepted:
                 task_data = dialog.get_task_data()
                 new_task = Task(
-                    id=None,
+                    id=self.writer.new_temp_id(),
                     title=task_data['title'],
                     description=task_data['description'],
                     priority=task_data['priority'],
                     status=task_data['status'],
                     due_date=task_data['due_date'],
-                    created_at=datetime.now(),
-                    category_id=task_data['category_id']
+                    created_at=utc_now(),
+                    category_id=task_data['category_id'],
+                    recurrence=task_data['recurrence']
                 )
-                self.db.add_task(new_task)
-                self.load_tasks()
+                change = TaskChange(inserted=[new_task])
+                ticket = self.writer.add_task(new_task)
+                self.submit_write(ticket, change, partial(self.on_task_added, new_task.id))
+                self.apply_change(change)
                 self.play_notification_sound()
                 logger.info("Новая задача добавлена")
         except Exception as e:
@@ -337,82 +679,157 @@ class MainWindow(QMainWindow):
     def edit_task(self):
         """Редактирование выбранной задачи"""
         try:
-            current_item = self.tasks_list.currentItem()
-            if not current_item:
+            task = self.current_task()
+            if not task:
                 QMessageBox.warning(self, "Предупреждение", "Выберите задачу для редактирования")
                 return
 
-            task = current_item.data(Qt.UserRole)
+            full_task = task
+            if task.description is None:
+                # В списке задачи без описаний: описание читается из базы,
+                # остальные поля берутся из списка (в нем уже есть еще не записанные изменения)
+                stored = self.db.get_task(task.id)
+                if stored is None:
+                    QMessageBox.warning(self, "Предупреждение", "Задача не найдена, список будет обновлен")
+                    self.refresh_tasks()
+                    return
+                full_task = replace(task, description=stored.description)
+
             from ui.task_dialog import TaskDialog
             categories = self.db.get_categories()
-            dialog = TaskDialog(self, task, categories)
+            dialog = TaskDialog(self, full_task, categories)
             if dialog.exec_() == QDialog.Accepted:
                 updated_data = dialog.get_task_data()
-                task.title = updated_data['title']
-                task.description = updated_data['description']
-                task.priority = updated_data['priority']
-                task.status = updated_data['status']
-                task.due_date = updated_data['due_date']
-                task.category_id = updated_data['category_id']
-
-                self.db.update_task(task)
-                self.load_tasks()
-                logger.info(f"Задача '{task.title}' обновлена")
+                # Пока диалог был открыт, новая задача могла получить постоянный id
+                updated_task = replace(
+                    full_task,
+                    id=task.id,
+                    title=updated_data['title'],
+                    description=updated_data['description'],
+                    priority=updated_data['priority'],
+                    status=updated_data['status'],
+                    due_date=updated_data['due_date'],
+                    category_id=updated_data['category_id'],
+                    recurrence=updated_data['recurrence']
+                )
+
+                change = TaskChange(updated=[updated_task], previous={task.id: task})
+                self.submit_write(self.writer.update_task(updated_task), change)
+                self.apply_change(change)
+                logger.info(f"Задача '{updated_task.title}' обновлена")
         except Exception as e:
             logger.error(f"Ошибка при редактировании задачи: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось редактировать задачу: {e}")
 
     def delete_task(self):
-        """Удаление выбранной задачи"""
+        """Удаление выбранных задач"""
         try:
-            current_item = self.tasks_list.currentItem()
-            if not current_item:
+            tasks = self.selected_tasks()
+            if not tasks:
                 return
 
-            task = current_item.data(Qt.UserRole)
-
             # Проверка настройки подтверждения удаления
-            confirm_deletion = self.settings.value("confirm_deletion", True, type=bool)
+            confirm_deletion = self.settings.get("confirm_deletion")
             if confirm_deletion:
+                if len(tasks) == 1:
+                    question = f"Вы уверены, что хотите удалить задачу '{tasks[0].title}'?"
+                else:
+                    question = f"Вы уверены, что хотите удалить выбранные задачи ({len(tasks)})?"
                 reply = QMessageBox.question(
                     self,
                     "Подтверждение удаления",
-                    f"Вы уверены, что хотите удалить задачу '{task.title}'?",
+                    question,
                     QMessageBox.Yes | QMessageBox.No
                 )
                 if reply != QMessageBox.Yes:
                     return
 
-            self.db.delete_task(task.id)
-            self.load_tasks()
+            change = TaskChange(removed=tasks)
+            self.submit_write(self.writer.delete_tasks([task.id for task in tasks]), change)
+            self.apply_change(change)
             self.play_notification_sound()
-            logger.info(f"Задача '{task.title}' удалена")
+            logger.info(f"Удалено задач: {len(tasks)}")
         except Exception as e:
             logger.error(f"Ошибка при удалении задачи: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось удалить задачу: {e}")
 
     def complete_task(self):
-        """Отметка задачи как выполненной"""
+        """Отметка выбранных задач как выполненных"""
         try:
-            current_item = self.tasks_list.currentItem()
-            if not current_item:
+            tasks = [task for task in self.selected_tasks() if task.status != Status.COMPLETED]
+            if not tasks:
                 return
 
-            task = current_item.data(Qt.UserRole)
-            task.status = Status.COMPLETED
-            self.db.update_task(task)
-            self.load_tasks()
+            plain = [task for task in tasks if not task.recurrence]
+            completed = [replace(task, status=Status.COMPLETED) for task in plain]
+
+            # У повторяющейся задачи завершается только текущее повторение:
+            # оно становится отдельной задачей, а серия переходит к следующему сроку
+            occurrences, items = [], []
+            for task in tasks:
+                if not task.recurrence:
+                    continue
+                next_due = next_due_date(task.recurrence, task.due_date)
+                if next_due is None:
+                    completed.append(replace(task, status=Status.COMPLETED))
+                    items.append((task.id, None))
+                    continue
+                occurrence = replace(task, id=self.writer.new_temp_id(), status=Status.COMPLETED,
+                                     created_at=utc_now(), recurrence=None)
+                occurrences.append(occurrence)
+                completed.append(replace(task, due_date=next_due))
+                items.append((task.id, occurrence.id))
+            change = TaskChange(inserted=occurrences, updated=completed,
+                                previous={task.id: task for task in tasks})
+            if plain:
+                self.submit_write(
+                    self.writer.set_status_many([task.id for task in plain], Status.COMPLETED), change)
+            if items:
+                self.submit_write(self.writer.complete_occurrences(items), change,
+                                  self.on_occurrences_completed)
+
+            self.apply_change(change)
             self.play_notification_sound()
-            logger.info(f"Задача '{task.title}' завершена")
+            logger.info(f"Завершено задач: {len(tasks)}")
         except Exception as e:
             logger.error(f"Ошибка при завершении задачи: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось завершить задачу: {e}")
 
+    def move_tasks_to_category(self, category_id):
+        """Перенос выбранных задач в категорию (None — без категории)"""
+        try:
+            tasks = [task for task in self.selected_tasks() if task.category_id != category_id]
+            if not tasks:
+                return
 
-    def on_task_double_clicked(self, item):
+            moved = [replace(task, category_id=category_id) for task in tasks]
+            change = TaskChange(updated=moved, previous={task.id: task for task in tasks})
+            self.submit_write(self.writer.update_tasks(moved), change)
+            self.apply_change(change)
+            logger.info(f"Перенесено задач в категорию {category_id}: {len(tasks)}")
+        except Exception as e:
+            logger.error(f"Ошибка при переносе задач: {e}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось перенести задачи: {e}")
+
+    def choose_category_for_tasks(self):
+        """Выбор категории для выбранных задач (Ctrl+M)"""
+        try:
+            if not self.selected_tasks():
+                return
+            categories = self.db.get_categories()
+            names = ["Без категории"] + [category.name for category in categories]
+            name, ok = QInputDialog.getItem(self, "Перенос задач", "Категория:", names, 0, False)
+            if ok:
+                category_ids = [None] + [category.id for category in categories]
+                self.move_tasks_to_category(category_ids[names.index(name)])
+        except Exception as e:
+            logger.error(f"Ошибка при выборе категории: {e}")
+
+
+    def on_task_double_clicked(self, index):
         """Обработка двойного клика по задаче"""
         try:
-            task = item.data(Qt.UserRole)
+            task = self.task_model.task_at(index.row())
             self.task_double_clicked.emit(task)
             logger.info(f"Двойной клик по задаче: {task.title}")
         except Exception as e:
@@ -435,6 +852,13 @@ class MainWindow(QMainWindow):
             complete_action.triggered.connect(self.complete_task)
             menu.addAction(complete_action)
 
+            move_menu = menu.addMenu("Переместить в категорию")
+            move_menu.addAction("Без категории").triggered.connect(
+                lambda: self.move_tasks_to_category(None))
+            for category in self.db.get_categories():
+                move_menu.addAction(category.name).triggered.connect(
+                    lambda _, category_id=category.id: self.move_tasks_to_category(category_id))
+
             menu.exec_(self.tasks_list.mapToGlobal(position))
             logger.info("Открыто контекстное меню")
         except Exception as e:
@@ -474,10 +898,15 @@ class MainWindow(QMainWindow):
             )
 
             if reply == QMessageBox.Yes:
-                success = self.db.delete_category(category_id)
+                success = self.repository.delete_category(category_id)
                 if success:
                     self.load_categories()
-                    self.load_tasks()
+                    if self.current_category_id == category_id:
+                        self.current_category_id = None
+                        self.load_tasks()
+                    else:
+                        # Задачи остаются на месте, меняется только их категория
+                        self.task_model.reassign_category(category_id, None)
                     self.play_notification_sound()
                     QMessageBox.information(self, "Успех", f"Категория '{display_name}' удалена")
                     logger.info(f"Категория '{display_name}' удалена")
@@ -513,49 +942,48 @@ class MainWindow(QMainWindow):
         """Открытие окна настроек"""
         try:
             from ui.settings_window import SettingsWindow
-            settings_window = SettingsWindow(self)
-            settings_window.settings_changed.connect(self.on_settings_changed)
+            settings_window = SettingsWindow(self, sound=self.sound, settings=self.settings)
             settings_window.exec_()
             logger.info("Открыто окно настроек")
         except Exception as e:
             logger.error(f"Ошибка при открытии настроек: {e}")
             QMessageBox.critical(self, "Ошибка", f"Не удалось открыть настройки: {e}")
 
-    def on_settings_changed(self, settings_dict):
-        """Обработчик изменения настроек"""
+    def on_settings_changed(self, keys):
+        """Применение только изменившихся настроек"""
         try:
-            # Сохраняем настройки
-            for key, value in settings_dict.items():
-                if key == 'font':
-                    self.settings.setValue("font_family", value.family())
-                    self.settings.setValue("font_size", value.pointSize())
-                else:
-                    self.settings.setValue(key, value)
-
-            # Применяем настройки немедленно
-            self.apply_settings()
-
+            if "theme" in keys:
+                self.apply_theme(self.settings.get("theme"))
+            if keys & {"font_family", "font_size"}:
+                self.apply_font()
+            if keys & {"sound_enabled", "volume"}:
+                self.configure_sound()
+            if "desktop_notifications" in keys and self.tray_icon is not None:
+                self.tray_icon.setVisible(self.settings.get("desktop_notifications"))
         except Exception as e:
             logger.error(f"Ошибка применения измененных настроек: {e}")
 
     def apply_settings(self):
-        """Применение настроек из QSettings"""
+        """Применение всех настроек (при запуске)"""
         try:
-            # Применение темы
-            theme = self.settings.value("theme", "Светлая")
-            self.apply_theme(theme)
-
-            # Применение шрифта
-            font_family = self.settings.value("font_family", "Arial")
-            font_size = self.settings.value("font_size", 10, type=int)
-            font = QFont(font_family, font_size)
-            self.setFont(font)
-
+            self.apply_theme(self.settings.get("theme"))
+            self.apply_font()
+            self.configure_sound()
             logger.info("Настройки применены")
 
         except Exception as e:
             logger.error(f"Ошибка применения настроек: {e}")
 
+    def apply_font(self):
+        """Применение шрифта из настроек"""
+        self.setFont(QFont(self.settings.get("font_family"), self.settings.get("font_size")))
+
+    def configure_sound(self):
+        """Передача настроек звука звуку уведомлений"""
+        self.sound.configure(self.settings.get("sound_enabled"), self.settings.get("volume"))
+        if self.sound.enabled and self.db is not None:
+            self.sound.preload()
+
     def apply_theme(self, theme_name):
         """Применение выбранной темы"""
         try:
@@ -576,7 +1004,7 @@ class MainWindow(QMainWindow):
                 QPushButton:hover {
                     background-color: #2980b9;
                 }
-                QListWidget, QLineEdit, QComboBox, QTextEdit, QDateEdit {
+                QListWidget, QListView, QLineEdit, QComboBox, QTextEdit, QDateEdit {
                     background-color: #34495e;
                     color: #ecf0f1;
                     border: 1px solid #5a6c7d;
@@ -605,25 +1033,30 @@ class MainWindow(QMainWindow):
 
     def play_notification_sound(self):
         """Воспроизведение звука уведомления с учетом настроек"""
-        try:
-            sound_enabled = self.settings.value("sound_enabled", True, type=bool)
-            if not sound_enabled:
-                return
-
-            # Пытаемся найти звуковой файл в разных местах
-            sound_paths = [
-                Path(__file__).parent.parent.parent / "resources" / "sounds" / "notification.wav",
-                Path("resources/sounds/notification.wav"),
-                Path("notification.wav")
-            ]
-
-            for sound_path in sound_paths:
-                if sound_path.exists():
-                    QSound.play(str(sound_path))
-                    logger.info("Воспроизведен звук уведомления")
-                    return
-
-            logger.warning("Звуковой файл не найден")
+        self.sound.play()
 
+    def closeEvent(self, event):
+        """Закрытие соединений с базой данных при выходе"""
+        try:
+            self.closing = True
+            self.watcher.stop()
+            self.reminders.stop()
+            self.search_controller.shutdown()
+            self.loader.shutdown()
+            if self.writer is not None:
+                # База закрывается только после записи всех команд: иначе они потеряются
+                if not self.writer.shutdown(WRITER_SHUTDOWN_NOTICE_S):
+                    logger.warning("Запись изменений при закрытии затянулась")
+                    QMessageBox.information(
+                        self, "Сохранение изменений",
+                        "Изменения еще записываются в базу данных.\n"
+                        "Окно закроется, когда запись завершится."
+                    )
+                    self.writer.shutdown()
+                self.write_snapshot()
+            # База могла открыться, пока окно закрывалось
+            if self.loader.db is not None:
+                self.loader.db.close()
         except Exception as e:
-            logger.error(f"Ошибка воспроизведения звука: {e}")
\ No newline at end of file
+            logger.error(f"Ошибка закрытия базы данных: {e}")
+        super().closeEvent(event)
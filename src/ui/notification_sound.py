@@ -0,0 +1,108 @@
+import time
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from PyQt5.QtCore import QObject, QTimer, QUrl
+
+logger = logging.getLogger(__name__)
+
+SOUND_FILE = "notification.wav"
+
+
+@lru_cache(maxsize=1)
+def find_sound_file() -> Optional[Path]:
+    """Поиск звукового файла (один раз за запуск)"""
+    sound_paths = [
+        Path(__file__).parent.parent.parent / "resources" / "sounds" / SOUND_FILE,
+        Path("resources/sounds") / SOUND_FILE,
+        Path(SOUND_FILE)
+    ]
+    for sound_path in sound_paths:
+        if sound_path.exists():
+            return sound_path.resolve()
+    logger.warning("Звуковой файл не найден")
+    return None
+
+
+class NotificationSound(QObject):
+    """Звук уведомления.
+
+    Файл ищется и декодируется один раз (QSoundEffect), воспроизведение асинхронное.
+    Вызовы чаще MIN_INTERVAL_MS (например, при пакетных операциях) объединяются в один звук.
+    """
+
+    MIN_INTERVAL_MS = 150
+
+    def __init__(self, parent=None, min_interval_ms: int = MIN_INTERVAL_MS):
+        super().__init__(parent)
+        self.enabled = True
+        self.volume = 50
+        self.min_interval = min_interval_ms / 1000
+        self._effect = None
+        # QtMultimedia не загрузилась (например, нет библиотек звуковой системы)
+        self._failed = False
+        self._last_played = float("-inf")
+        self._pending_volume: Optional[int] = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._play_pending)
+
+    def configure(self, enabled: bool, volume: int):
+        """Настройки sound_enabled и volume (0–100)"""
+        self.enabled = enabled
+        self.volume = volume
+
+    def available(self) -> bool:
+        return not self._failed and find_sound_file() is not None
+
+    def preload(self):
+        """Загрузка и декодирование звука заранее, до первого воспроизведения.
+
+        Ошибка загрузки не пробрасывается: звук просто становится недоступен.
+        """
+        if self._effect is not None or self._failed:
+            return
+        sound_path = find_sound_file()
+        if sound_path is None:
+            return
+        try:
+            # QtMultimedia загружается при первом обращении к звуку, а не при запуске
+            from PyQt5.QtMultimedia import QSoundEffect
+            effect = QSoundEffect(self)
+            effect.setSource(QUrl.fromLocalFile(str(sound_path)))
+        except Exception as e:
+            self._failed = True
+            logger.error(f"Звук уведомлений недоступен: {e}")
+            return
+        self._effect = effect
+
+    def play(self, volume: Optional[int] = None):
+        """Воспроизведение звука; volume задает громкость вместо настройки (проверка звука)"""
+        if volume is None:
+            if not self.enabled:
+                return
+            volume = self.volume
+        self._pending_volume = volume
+        if self._timer.isActive():
+            return
+        wait = self._last_played + self.min_interval - time.monotonic()
+        if wait > 0:
+            self._timer.start(int(wait * 1000) + 1)
+        else:
+            self._play_pending()
+
+    def _play_pending(self):
+        volume, self._pending_volume = self._pending_volume, None
+        if volume is None:
+            return
+        try:
+            self.preload()
+            if self._effect is None:
+                return
+            self._effect.setVolume(volume / 100)
+            self._effect.play()
+            self._last_played = time.monotonic()
+        except Exception as e:
+            logger.error(f"Ошибка воспроизведения звука: {e}")
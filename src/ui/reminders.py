@@ -0,0 +1,213 @@
+import sys
+import time
+import heapq
+import logging
+from datetime import date, datetime, time as day_time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+current_dir = Path(__file__).parent
+src_dir = current_dir.parent
+sys.path.insert(0, str(src_dir))
+
+from models import Task, TaskChange, Status
+from recurrence import parse_recurrence
+
+logger = logging.getLogger(__name__)
+
+# Задачи, о сроке которых напоминаем
+REMINDED_STATUSES = frozenset({Status.PENDING, Status.IN_PROGRESS})
+
+# id задачи -> (момент напоминания, название, правило повторения)
+ReminderPlan = Dict[int, Tuple[float, str, Optional[str]]]
+
+
+class ReminderScheduler(QObject):
+    """Напоминания о наступлении срока задач.
+
+    Моменты напоминаний хранятся в min-куче, и на ближайший из них заведен единственный
+    QTimer. Изменения задач обновляют кучу за O(log n): устаревшие записи не удаляются
+    сразу, а пропускаются при извлечении. Напоминания, наступившие одновременно,
+    сообщаются одним сигналом. У повторяющейся задачи запланировано одно напоминание —
+    о ближайшем повторении; после него планируется следующее.
+
+    Полная загрузка строится в фоне (plan) и подменяет напоминания одним вызовом load;
+    изменения, пришедшие за время построения, применяются поверх нее.
+    """
+    # [(id, название)] задач, срок которых наступил
+    due = pyqtSignal(list)
+
+    # Время дня, в которое напоминаем о задачах со сроком на этот день (местное время)
+    REMIND_AT = day_time(9, 0)
+    # Напоминания, до которых осталось меньше этого, объединяются с текущими
+    COALESCE_SECONDS = 1.0
+    # Таймер перезаводится не реже раза в час: переживает сон системы и перевод часов
+    MAX_TIMER_MS = 3600 * 1000
+
+    def __init__(self, parent=None, remind_at: day_time = REMIND_AT):
+        super().__init__(parent)
+        self.remind_at = remind_at
+        # (момент напоминания, id); записи, не совпадающие с _entries, устарели
+        self._heap: List[Tuple[float, int]] = []
+        self._entries: ReminderPlan = {}
+        # id -> момент уже показанного напоминания: правка задачи не повторяет его
+        self._fired: Dict[int, float] = {}
+        # Момент напоминания по дате срока: у многих задач сроки совпадают
+        self._moments: Dict[date, float] = {}
+        # Изменения после begin_load: (метод, аргументы) для повтора поверх загруженного плана
+        self._replay: Optional[List[Tuple[Callable, tuple]]] = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def reminder_time(self, task: Task,
+                      moments: Optional[Dict[date, float]] = None) -> Optional[float]:
+        """Момент напоминания (Unix-время) или None, если напоминать не о чем.
+
+        task — Task или ReminderTask; moments — кэш моментов по датам вместо общего.
+        """
+        due = task.due_date
+        if isinstance(due, datetime):
+            due = due.date()
+        if due is None or task.status not in REMINDED_STATUSES:
+            return None
+        if task.recurrence:
+            # Срок серии — ближайшее невыполненное повторение; если он прошел,
+            # напоминание о первом повторении начиная с сегодняшнего дня
+            rule = parse_recurrence(task.recurrence)
+            today = date.today()
+            if rule is not None and due < today:
+                due = rule.first_on_or_after(today)
+                if due is None:
+                    return None
+        return self._moment(due, moments)
+
+    def _moment(self, day: date, moments: Optional[Dict[date, float]] = None) -> float:
+        if moments is None:
+            moments = self._moments
+        moment = moments.get(day)
+        if moment is None:
+            moment = moments[day] = datetime.combine(day, self.remind_at).timestamp()
+        return moment
+
+    def _next_moment(self, recurrence: str, moment: float) -> Optional[float]:
+        """Момент напоминания о повторении, следующем за напомненным в moment"""
+        rule = parse_recurrence(recurrence)
+        day = rule.next_after(datetime.fromtimestamp(moment).date()) if rule is not None else None
+        return self._moment(day) if day is not None else None
+
+    def plan(self, tasks: Iterable[Task]) -> ReminderPlan:
+        """Напоминания задач для load (например, DatabaseManager.get_reminder_tasks).
+
+        Состояние планировщика не меняется, поэтому план строится в фоновом потоке.
+        """
+        moments: Dict[date, float] = {}
+        entries = {}
+        for task in tasks:
+            moment = self.reminder_time(task, moments)
+            if moment is not None:
+                entries[task.id] = (moment, task.title, task.recurrence)
+        return entries
+
+    def begin_load(self):
+        """Начало фонового построения плана: последующие изменения повторятся после load"""
+        self._replay = []
+
+    def cancel_load(self):
+        """План не построен: текущие напоминания остаются"""
+        self._replay = None
+
+    def load(self, entries: ReminderPlan):
+        """Полная замена напоминаний планом из plan"""
+        replay, self._replay = self._replay or [], None
+        self._entries = entries
+        self._fired = {}
+        self._moments = {}
+        self._heap = [(entry[0], task_id) for task_id, entry in entries.items()]
+        heapq.heapify(self._heap)
+        logger.info(f"Запланировано напоминаний: {len(entries)}")
+        for method, args in replay:
+            method(*args)
+        self._arm()
+
+    def apply_change(self, change: TaskChange):
+        """Обновление напоминаний по изменениям задач"""
+        if self._replay is not None:
+            self._replay.append((self.apply_change, (change,)))
+        for task in change.removed:
+            self._entries.pop(task.id, None)
+            self._fired.pop(task.id, None)
+        for task in (*change.updated, *change.inserted):
+            self._schedule(task)
+        self._compact()
+        self._arm()
+
+    def rekey(self, old_id: int, new_id: int):
+        """Замена временного id задачи на id, выданный базой"""
+        if self._replay is not None:
+            self._replay.append((self.rekey, (old_id, new_id)))
+        if old_id in self._fired:
+            self._fired[new_id] = self._fired.pop(old_id)
+        entry = self._entries.pop(old_id, None)
+        if entry is not None:
+            self._entries[new_id] = entry
+            heapq.heappush(self._heap, (entry[0], new_id))
+
+    def _schedule(self, task: Task):
+        moment = self.reminder_time(task)
+        if moment is not None and task.recurrence and self._fired.get(task.id) == moment:
+            # О текущем повторении уже напомнили: следующее напоминание — о следующем
+            moment = self._next_moment(task.recurrence, moment)
+        if moment is None or self._fired.get(task.id) == moment:
+            self._entries.pop(task.id, None)
+            return
+        previous = self._entries.get(task.id)
+        self._entries[task.id] = (moment, task.title, task.recurrence)
+        if previous is None or previous[0] != moment:
+            heapq.heappush(self._heap, (moment, task.id))
+
+    def _is_current(self, item: Tuple[float, int]) -> bool:
+        entry = self._entries.get(item[1])
+        return entry is not None and entry[0] == item[0]
+
+    def _compact(self):
+        # Устаревших записей больше, чем действующих: куча перестраивается за O(n)
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if self._is_current(item)]
+            heapq.heapify(self._heap)
+
+    def _arm(self):
+        """Таймер на ближайшее напоминание"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._timer.stop()
+            return
+        delay_ms = max(0, int((self._heap[0][0] - time.time()) * 1000))
+        self._timer.start(min(delay_ms, self.MAX_TIMER_MS))
+
+    def _fire(self):
+        limit = time.time() + self.COALESCE_SECONDS
+        due = []
+        while self._heap and self._heap[0][0] <= limit:
+            item = heapq.heappop(self._heap)
+            if self._is_current(item):
+                moment, task_id = item
+                _, title, recurrence = self._entries.pop(task_id)
+                self._fired[task_id] = moment
+                due.append((task_id, title))
+                next_moment = self._next_moment(recurrence, moment) if recurrence else None
+                if next_moment is not None:
+                    self._entries[task_id] = (next_moment, title, recurrence)
+                    heapq.heappush(self._heap, (next_moment, task_id))
+        if due:
+            self.due.emit(due)
+        self._arm()
+
+    def stop(self):
+        self._timer.stop()
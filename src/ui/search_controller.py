@@ -0,0 +1,101 @@
+import logging
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class SearchSignals(QObject):
+    # generation, текст запроса, результат search_func
+    finished = pyqtSignal(int, str, object)
+    failed = pyqtSignal(int, str)
+
+
+class SearchWorker(QRunnable):
+    """Выполнение поискового запроса в пуле потоков"""
+
+    def __init__(self, controller, generation: int, text: str):
+        super().__init__()
+        self.controller = controller
+        self.generation = generation
+        self.text = text
+
+    def run(self):
+        # Запрос, который уже устарел, даже не отправляем в базу
+        if self.controller.is_stale(self.generation):
+            return
+        try:
+            result = self.controller.search_func(self.text)
+        except Exception as e:
+            self.controller.signals.failed.emit(self.generation, str(e))
+            return
+        if not self.controller.is_stale(self.generation):
+            self.controller.signals.finished.emit(self.generation, self.text, result)
+
+
+class SearchController(QObject):
+    """Поиск по мере ввода: задержка ввода, фоновый запрос, отбрасывание устаревших результатов"""
+    results_ready = pyqtSignal(str, object)
+    cleared = pyqtSignal()
+
+    DEBOUNCE_MS = 250
+
+    def __init__(self, search_func, parent=None, debounce_ms: int = DEBOUNCE_MS):
+        super().__init__(parent)
+        self.search_func = search_func
+        self.generation = 0
+        self._pending_text = ""
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # Поток поиска живет все время работы: соединения с базой привязаны к потоку
+        self.pool.setExpiryTimeout(-1)
+
+        self.signals = SearchSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self._start_search)
+
+    def is_stale(self, generation: int) -> bool:
+        """Был ли запрос вытеснен более новым"""
+        return generation != self.generation
+
+    def set_text(self, text: str):
+        """Новый текст поиска; запрос уйдет после паузы во вводе"""
+        self.generation += 1
+        self._pending_text = text.strip()
+        if not self._pending_text:
+            self.debounce_timer.stop()
+            self.pool.clear()
+            self.cleared.emit()
+            return
+        self.debounce_timer.start()
+
+    def cancel(self):
+        """Отмена ожидающих и выполняющихся запросов"""
+        self.generation += 1
+        self.debounce_timer.stop()
+        self.pool.clear()
+
+    def _start_search(self):
+        # Еще не начатые устаревшие запросы снимаются из очереди
+        self.pool.clear()
+        self.pool.start(SearchWorker(self, self.generation, self._pending_text))
+
+    def _on_finished(self, generation: int, text: str, result):
+        if self.is_stale(generation):
+            return
+        self.results_ready.emit(text, result)
+
+    def _on_failed(self, generation: int, message: str):
+        if not self.is_stale(generation):
+            logger.error(f"Ошибка поиска задач: {message}")
+
+    def shutdown(self):
+        """Остановка пула перед закрытием окна"""
+        self.cancel()
+        self.pool.waitForDone(1000)
@@ -6,24 +6,29 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QComboBox, QCheckBox, QSlider,
                              QGroupBox, QColorDialog, QFontDialog, QMessageBox,
                              QTabWidget, QWidget, QSpinBox, QFormLayout)
-from PyQt5.QtCore import Qt, pyqtSignal, QSettings
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor
-from PyQt5.QtMultimedia import QSound
 
 # Добавляем путь к модулям
 current_dir = Path(__file__).parent
 src_dir = current_dir.parent
 sys.path.insert(0, str(src_dir))
 
+from settings_store import SettingsStore
+from ui.notification_sound import NotificationSound
+
 logger = logging.getLogger(__name__)
 
 
 class SettingsWindow(QDialog):
     settings_changed = pyqtSignal(dict)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, sound: NotificationSound = None, settings: SettingsStore = None):
         super().__init__(parent)
-        self.settings = QSettings("SmartTodo", "TaskManager")
+        # Общие с главным окном настройки; без них читаются свои
+        self.settings = settings or SettingsStore(self)
+        # Звук главного окна уже загружен; без него создается свой
+        self.sound = sound or NotificationSound(self)
         self.setup_ui()
         self.load_settings()
 
@@ -212,39 +217,39 @@ class SettingsWindow(QDialog):
         """Загрузка сохраненных настроек"""
         try:
             # Настройки темы
-            theme = self.settings.value("theme", "Светлая")
+            theme = self.settings.get("theme")
             index = self.theme_combo.findText(theme)
             if index >= 0:
                 self.theme_combo.setCurrentIndex(index)
 
             # Настройки поведения
             self.auto_save_check.setChecked(
-                self.settings.value("auto_save", False, type=bool)
+                self.settings.get("auto_save")
             )
             self.start_minimized_check.setChecked(
-                self.settings.value("start_minimized", False, type=bool)
+                self.settings.get("start_minimized")
             )
             self.confirm_deletion_check.setChecked(
-                self.settings.value("confirm_deletion", True, type=bool)
+                self.settings.get("confirm_deletion")
             )
 
             # Настройки уведомлений
             self.sound_check.setChecked(
-                self.settings.value("sound_enabled", True, type=bool)
+                self.settings.get("sound_enabled")
             )
             self.volume_slider.setValue(
-                self.settings.value("volume", 50, type=int)
+                self.settings.get("volume")
             )
             self.desktop_notifications_check.setChecked(
-                self.settings.value("desktop_notifications", True, type=bool)
+                self.settings.get("desktop_notifications")
             )
             self.notification_timeout_spin.setValue(
-                self.settings.value("notification_timeout", 5, type=int)
+                self.settings.get("notification_timeout")
             )
 
             # Настройки шрифта
-            font_family = self.settings.value("font_family", "Arial")
-            font_size = self.settings.value("font_size", 10, type=int)
+            font_family = self.settings.get("font_family")
+            font_size = self.settings.get("font_size")
             self.current_font = QFont(font_family, font_size)
             self.font_label.setText(f"Текущий шрифт: {font_family}, {font_size}pt")
 
@@ -261,11 +266,9 @@ class SettingsWindow(QDialog):
     def test_sound(self):
         """Тестовое воспроизведение звука"""
         try:
-            sound_path = Path(__file__).parent.parent.parent / "resources" / "sounds" / "notification.wav"
-            if sound_path.exists():
-                sound = QSound(str(sound_path))
-                sound.play()
-                logger.info("Тестовый звук воспроизведен")
+            if self.sound.available():
+                # Громкость — текущее положение ползунка, еще не сохраненное в настройках
+                self.sound.play(volume=self.volume_slider.value())
             else:
                 QMessageBox.warning(self, "Предупреждение", "Звуковой файл не найден")
         except Exception as e:
@@ -275,22 +278,6 @@ class SettingsWindow(QDialog):
     def apply_settings(self):
         """Применение настроек"""
         try:
-            # Сохранение настроек
-            self.settings.setValue("theme", self.theme_combo.currentText())
-            self.settings.setValue("language", self.language_combo.currentText())
-            self.settings.setValue("auto_save", self.auto_save_check.isChecked())
-            self.settings.setValue("start_minimized", self.start_minimized_check.isChecked())
-            self.settings.setValue("confirm_deletion", self.confirm_deletion_check.isChecked())
-            self.settings.setValue("sound_enabled", self.sound_check.isChecked())
-            self.settings.setValue("volume", self.volume_slider.value())
-            self.settings.setValue("desktop_notifications", self.desktop_notifications_check.isChecked())
-            self.settings.setValue("notification_timeout", self.notification_timeout_spin.value())
-
-            if hasattr(self, 'current_font'):
-                self.settings.setValue("font_family", self.current_font.family())
-                self.settings.setValue("font_size", self.current_font.pointSize())
-
-            # Отправка сигнала с настройками
             settings_dict = {
                 'theme': self.theme_combo.currentText(),
                 'language': self.language_combo.currentText(),
@@ -304,6 +291,13 @@ class SettingsWindow(QDialog):
                 'font': getattr(self, 'current_font', QFont('Arial', 10))
             }
 
+            # Сохранение одной пачкой; подписчики узнают только об изменившихся ключах
+            values = {key: value for key, value in settings_dict.items() if key != 'font'}
+            values['font_family'] = settings_dict['font'].family()
+            values['font_size'] = settings_dict['font'].pointSize()
+            self.settings.update(values)
+
+            # Отправка сигнала с настройками
             self.settings_changed.emit(settings_dict)
             QMessageBox.information(self, "Успех", "Настройки применены успешно!")
             logger.info("Настройки применены")
@@ -322,7 +316,7 @@ class SettingsWindow(QDialog):
         )
 
         if reply == QMessageBox.Yes:
-            self.settings.clear()
+            self.settings.reset()
             self.load_settings()
             QMessageBox.information(self, "Успех", "Настройки сброшены к значениям по умолчанию")
             logger.info("Настройки сброшены")
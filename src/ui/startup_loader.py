@@ -0,0 +1,107 @@
+import sys
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+current_dir = Path(__file__).parent
+src_dir = current_dir.parent
+sys.path.insert(0, str(src_dir))
+
+from database import DatabaseManager
+from models import Status
+from query import TaskQuery
+from repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LoaderSignals(QObject):
+    # открытая база, первая страница (задачи, курсор) или None, если снимок актуален
+    opened = pyqtSignal(object, object)
+    # загруженный репозиторий, версия базы (номер журнала) перед загрузкой
+    warmed = pyqtSignal(object, int)
+    # план напоминаний или None, если его не удалось построить
+    reminders = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class _Job(QRunnable):
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        self.func()
+
+
+class StartupLoader(QObject):
+    """Загрузка данных после показа окна.
+
+    Открытие базы (с миграциями) и первая страница списка читаются в фоне,
+    затем там же заполняется кэш задач в памяти. Окно отрисовывается сразу,
+    и время до первой отрисовки не зависит от размера базы.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.db = None
+        # Версия базы (см. DatabaseManager.stored_version) до чтения первой страницы
+        self.version = None
+        self.signals = LoaderSignals()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # Постоянный поток: его соединение с базой открывается один раз
+        self.pool.setExpiryTimeout(-1)
+
+    def open(self, profile: str, page_size: int, snapshot_version: Optional[tuple] = None):
+        """Открытие базы и чтение первой страницы (новые задачи сверху).
+
+        Если база не менялась с момента снимка snapshot_version, страница не читается.
+        """
+        def job():
+            try:
+                self.db = DatabaseManager(profile=profile)
+                self.version = self.db.stored_version()
+                first_page = None
+                if snapshot_version is None or self.version != snapshot_version:
+                    first_page = self.db.query_tasks_page(TaskQuery(), page_size, summary=True)
+            except Exception as e:
+                self.signals.failed.emit(str(e))
+                return
+            self.signals.opened.emit(self.db, first_page)
+        self.pool.start(_Job(job))
+
+    def warm_up(self, db: DatabaseManager):
+        """Заполнение нового репозитория задачами в фоне"""
+        def job():
+            repository = TaskRepository(db)
+            try:
+                version = db.stored_version()[1]
+                repository.load()
+            except Exception as e:
+                logger.error(f"Ошибка загрузки кэша задач: {e}")
+                return
+            self.signals.warmed.emit(repository, version)
+        self.pool.start(_Job(job))
+
+    def load_reminders(self, db: DatabaseManager, statuses: Iterable[Status],
+                       plan: Callable[[Iterable], object]):
+        """Чтение задач для напоминаний и построение плана plan(задачи) в фоне"""
+        statuses = list(statuses)
+
+        def job():
+            try:
+                result = plan(db.get_reminder_tasks(date.today(), statuses))
+            except Exception as e:
+                logger.error(f"Ошибка загрузки напоминаний: {e}")
+                result = None
+            self.signals.reminders.emit(result)
+        self.pool.start(_Job(job))
+
+    def shutdown(self):
+        """Ожидание фоновой загрузки перед закрытием окна"""
+        self.pool.clear()
+        self.pool.waitForDone()
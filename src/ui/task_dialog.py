@@ -16,6 +16,7 @@ src_dir = current_dir.parent
 sys.path.insert(0, str(src_dir))
 
 from models import Task, Priority, Status
+from recurrence import Frequency, RecurrenceRule, parse_recurrence
 
 class TaskDialog(QDialog):
     def __init__(self, parent=None, task: Task = None, categories=None):
@@ -70,6 +71,14 @@ class TaskDialog(QDialog):
         self.due_date_edit.setMinimumDate(QDate.currentDate())
         layout.addWidget(self.due_date_edit)
 
+        # Повторение (срок задачи — дата первого повторения)
+        layout.addWidget(QLabel("Повторение:"))
+        self.recurrence_combo = QComboBox()
+        self.recurrence_combo.addItem("Не повторяется", None)
+        for frequency in Frequency:
+            self.recurrence_combo.addItem(frequency.value, frequency.name)
+        layout.addWidget(self.recurrence_combo)
+
         # Категория
         layout.addWidget(QLabel("Категория:"))
         self.category_combo = QComboBox()
@@ -98,9 +107,10 @@ class TaskDialog(QDialog):
 
     def load_data(self):
         """Загрузка данных задачи"""
+        self.loaded_due_date = self.due_date_edit.date()
         if self.task:
             self.title_input.setText(self.task.title)
-            self.description_input.setText(self.task.description)
+            self.description_input.setText(self.task.description or "")
             self.priority_combo.setCurrentText(self.task.priority.value)
             self.status_combo.setCurrentText(self.task.status.value)
             if self.task.due_date:
@@ -110,6 +120,16 @@ class TaskDialog(QDialog):
                     self.task.due_date.day
                 ))
 
+            # Правило, которое не выражается пунктом списка, сохраняется как есть
+            rule = parse_recurrence(self.task.recurrence)
+            if rule is not None:
+                if rule.is_simple():
+                    self.recurrence_combo.setCurrentIndex(self.recurrence_combo.findData(rule.frequency.name))
+                else:
+                    self.recurrence_combo.addItem(rule.describe().capitalize(), self.task.recurrence)
+                    self.recurrence_combo.setCurrentIndex(self.recurrence_combo.count() - 1)
+            self.loaded_due_date = self.due_date_edit.date()
+
             # Установка категории
             if self.task.category_id:
                 for i in range(self.category_combo.count()):
@@ -126,6 +146,20 @@ class TaskDialog(QDialog):
 
         self.accept()
 
+    def get_recurrence(self):
+        """Правило повторения из формы (строка для колонки recurrence или None)"""
+        # Данные пункта: имя частоты или строка правила, заданного не через этот список
+        choice = self.recurrence_combo.currentData()
+        if choice not in Frequency.__members__:
+            return choice
+        frequency = Frequency[choice]
+        rule = parse_recurrence(self.task.recurrence) if self.task else None
+        # Неизмененное правило не перезаписывается: серия сохраняет дату начала
+        if (rule is not None and rule.frequency is frequency
+                and self.due_date_edit.date() == self.loaded_due_date):
+            return self.task.recurrence
+        return RecurrenceRule(frequency, self.due_date_edit.date().toPyDate()).format()
+
     def get_task_data(self):
         """Получение данных задачи из формы"""
         return {
@@ -134,5 +168,6 @@ class TaskDialog(QDialog):
             'priority': Priority(self.priority_combo.currentText()),
             'status': Status(self.status_combo.currentText()),
             'due_date': self.due_date_edit.date().toPyDate(),
-            'category_id': self.category_combo.currentData()
+            'category_id': self.category_combo.currentData(),
+            'recurrence': self.get_recurrence()
         }
\ No newline at end of file
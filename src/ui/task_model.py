@@ -0,0 +1,266 @@
+import sys
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+current_dir = Path(__file__).parent
+src_dir = current_dir.parent
+sys.path.insert(0, str(src_dir))
+
+from models import Task, TaskChange, Priority, Status
+from query import TaskQuery, TaskSort
+
+logger = logging.getLogger(__name__)
+
+# Функция загрузки страницы: (размер, курсор) -> (задачи, следующий курсор или None)
+PageFetcher = Callable[[int, Optional[tuple]], Tuple[List[Task], Optional[tuple]]]
+# Подсказка строки по id задачи (например, найденный фрагмент текста) или None
+TooltipSource = Callable[[int], Optional[str]]
+
+
+def _row_ranges(rows: List[int]) -> List[Tuple[int, int]]:
+    """Отсортированные номера строк в диапазоны (первая, последняя)"""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
+class TaskListModel(QAbstractListModel):
+    """Модель списка задач с постраничной подгрузкой из базы данных"""
+    TaskRole = Qt.UserRole
+
+    PAGE_SIZE = 200
+
+    STATUS_ICONS = {Status.COMPLETED: "✓"}
+    PRIORITY_ICONS = {
+        Priority.LOW: "🟢",
+        Priority.MEDIUM: "🟡",
+        Priority.HIGH: "🔴"
+    }
+    COMPLETED_COLOR = QColor("#d4edda")
+    PRIORITY_COLORS = {
+        Priority.HIGH: QColor("#f8d7da"),
+        Priority.MEDIUM: QColor("#fff3cd")
+    }
+
+    def __init__(self, parent=None, page_size: int = PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self._tasks: List[Task] = []
+        self._fetcher: Optional[PageFetcher] = None
+        self._cursor = None
+        self._exhausted = True
+        # Индекс id -> строка, перестраивается лениво после вставок и удалений
+        self._row_index: Optional[Dict[int, int]] = None
+        self._tooltips: Optional[TooltipSource] = None
+        # Подсказки запрашиваются при наведении на строку и запоминаются
+        self._tooltip_cache: Dict[int, Optional[str]] = {}
+
+    def set_fetcher(self, fetcher: PageFetcher, first_page: Optional[tuple] = None,
+                    tooltips: Optional[TooltipSource] = None):
+        """Источник данных с ленивой подгрузкой страниц.
+
+        first_page — уже загруженная первая страница (задачи, курсор), например из фонового поиска;
+        tooltips — источник подсказок строк.
+        """
+        self.beginResetModel()
+        self._tasks = []
+        self._row_index = None
+        self._tooltips = tooltips
+        self._tooltip_cache = {}
+        self._fetcher = fetcher
+        self._cursor = None
+        self._exhausted = False
+        if first_page is not None:
+            tasks, self._cursor = first_page
+            self._tasks = list(tasks)
+            self._exhausted = self._cursor is None
+        self.endResetModel()
+        # Первая страница загружается сразу, не дожидаясь запроса от представления
+        if first_page is None:
+            self.fetchMore()
+
+    def set_tasks(self, tasks: List[Task]):
+        """Готовый список задач без подгрузки"""
+        self.beginResetModel()
+        self._tasks = list(tasks)
+        self._row_index = None
+        self._tooltips = None
+        self._tooltip_cache = {}
+        self._fetcher = None
+        self._cursor = None
+        self._exhausted = True
+        self.endResetModel()
+
+    def task_at(self, row: int) -> Optional[Task]:
+        """Задача в указанной строке"""
+        if 0 <= row < len(self._tasks):
+            return self._tasks[row]
+        return None
+
+    def row_of(self, task_id: int) -> Optional[int]:
+        """Строка задачи с указанным id среди загруженных"""
+        if self._row_index is None:
+            self._row_index = {task.id: row for row, task in enumerate(self._tasks)}
+        return self._row_index.get(task_id)
+
+    def apply_change(self, change: TaskChange, query: TaskQuery,
+                     text_matches: Optional[Set[int]] = None):
+        """Точечное обновление строк без перезагрузки списка.
+
+        query описывает текущее представление: какие задачи видны и в каком порядке.
+        text_matches — id задач, которые нашел по тексту запроса сам поиск в базе.
+        Без него задача без загруженного описания не проверяется по тексту и
+        в результаты поиска не добавляется, а только остается на своем месте.
+        """
+        searching = bool(query.text.strip())
+
+        def visible(task: Task, row: Optional[int]) -> bool:
+            if not query.matches(task):
+                return False
+            if text_matches is not None:
+                return not searching or task.id in text_matches
+            return not searching or task.description is not None or row is not None
+
+        # Строки ищутся до удалений, пока индекс id -> строка действителен
+        removed_rows = set()
+        moved = []
+        for task in change.removed:
+            row = self.row_of(task.id)
+            if row is not None:
+                removed_rows.add(row)
+        for task in change.updated:
+            row = self.row_of(task.id)
+            if row is None:
+                if visible(task, row):
+                    moved.append(task)
+            elif not visible(task, row):
+                removed_rows.add(row)
+            elif query.sort_key(task) == query.sort_key(self._tasks[row]):
+                self._tasks[row] = task
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+            else:
+                # Изменился ключ сортировки: строка переезжает на новое место
+                removed_rows.add(row)
+                moved.append(task)
+        self._remove_rows(removed_rows)
+        for task in moved:
+            self._insert_sorted(task, query)
+        for task in change.inserted:
+            if not visible(task, None):
+                continue
+            if query.sort is TaskSort.NEWEST:
+                # Новые задачи всегда самые свежие и попадают в начало списка
+                self._insert_row(0, task)
+            else:
+                self._insert_sorted(task, query)
+
+    def rekey(self, old_id: int, new_id: int):
+        """Замена временного id задачи на id, выданный базой"""
+        row = self.row_of(old_id)
+        if row is not None:
+            self._tasks[row].id = new_id
+            self._row_index = None
+
+    def reassign_category(self, old_category_id: int, new_category_id: Optional[int]):
+        """Перенос загруженных задач в другую категорию (строки не меняются)"""
+        for task in self._tasks:
+            if task.category_id == old_category_id:
+                task.category_id = new_category_id
+
+    def _remove_rows(self, rows):
+        """Удаление строк: подряд идущие снимаются одним сигналом, снизу вверх"""
+        for first, last in reversed(_row_ranges(sorted(rows))):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._tasks[first:last + 1]
+            self._row_index = None
+            self.endRemoveRows()
+
+    def _insert_sorted(self, task: Task, query: TaskQuery):
+        key = query.sort_key(task)
+        descending = query.sort.direction == "DESC"
+        row = 0
+        while row < len(self._tasks):
+            other = query.sort_key(self._tasks[row])
+            if (other < key) if descending else (other > key):
+                break
+            row += 1
+        if row == len(self._tasks) and not self._exhausted:
+            # Задача попадет в одну из следующих страниц
+            return
+        self._insert_row(row, task)
+
+    def _insert_row(self, row: int, task: Task):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self._row_index = None
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._fetcher is None:
+            return
+        try:
+            tasks, self._cursor = self._fetcher(self.page_size, self._cursor)
+        except Exception as e:
+            logger.error(f"Ошибка подгрузки задач: {e}")
+            tasks, self._cursor = [], None
+        if self._cursor is None:
+            self._exhausted = True
+        if not tasks:
+            return
+        first = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        self._tasks.extend(tasks)
+        if self._row_index is not None:
+            for row, task in enumerate(tasks, first):
+                self._row_index[task.id] = row
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.task_at(index.row())
+        if task is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.format_task(task)
+        if role == self.TaskRole:
+            return task
+        if role == Qt.ToolTipRole and self._tooltips is not None:
+            if task.id not in self._tooltip_cache:
+                self._tooltip_cache[task.id] = self._tooltips(task.id)
+            return self._tooltip_cache[task.id]
+        if role == Qt.BackgroundRole:
+            if task.status == Status.COMPLETED:
+                return self.COMPLETED_COLOR
+            return self.PRIORITY_COLORS.get(task.priority)
+        return None
+
+    def format_task(self, task: Task) -> str:
+        """Текст строки списка"""
+        status_icon = self.STATUS_ICONS.get(task.status, "○")
+        text = f"{status_icon} {task.title} {self.PRIORITY_ICONS[task.priority]}"
+        if task.due_date:
+            text += f" 📅 {task.due_date.strftime('%d.%m.%Y')}"
+        if task.recurrence:
+            text += " 🔁"
+        return text
@@ -0,0 +1,173 @@
+import sys
+import logging
+import queue
+import threading
+import time
+from dataclasses import replace
+from itertools import count
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+current_dir = Path(__file__).parent
+src_dir = current_dir.parent
+sys.path.insert(0, str(src_dir))
+
+from database import DatabaseManager
+from models import Task, Status
+
+logger = logging.getLogger(__name__)
+
+# Признак остановки потока записи в очереди команд
+_STOP = object()
+
+
+class TaskWriter(QObject):
+    """Единственный фоновый писатель в базу.
+
+    Команды выполняются по очереди в отдельном потоке; пришедшие в пределах
+    короткого окна объединяются в одну транзакцию (групповой коммит).
+    Результат каждой команды сообщается сигналом по ее номеру.
+    """
+    # номер команды, результат метода DatabaseManager
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+    GROUP_WINDOW_MS = 10
+    MAX_GROUP_SIZE = 500
+
+    def __init__(self, db: DatabaseManager, parent=None, group_window_ms: int = GROUP_WINDOW_MS):
+        super().__init__(parent)
+        self.db = db
+        self.group_window = group_window_ms / 1000
+        self._queue = queue.Queue()
+        self._tickets = count(1)
+        self._temp_ids = count(-1, -1)
+        # Временный id добавленной задачи -> id в базе; используется только потоком записи
+        self._real_ids: Dict[int, int] = {}
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="TaskWriter", daemon=True)
+        self._thread.start()
+
+    def new_temp_id(self) -> int:
+        """Временный (отрицательный) id задачи до ее записи в базу"""
+        return next(self._temp_ids)
+
+    def submit(self, func, *args) -> int:
+        """Постановка команды func(*args) в очередь; возвращает номер команды"""
+        ticket = next(self._tickets)
+        self._queue.put((ticket, func, args))
+        return ticket
+
+    def add_task(self, task: Task) -> int:
+        """Добавление задачи с временным id; результат команды — id в базе"""
+        return self.submit(self._add_task, replace(task))
+
+    def update_task(self, task: Task) -> int:
+        return self.submit(self._update_tasks, [replace(task)])
+
+    def update_tasks(self, tasks: Iterable[Task]) -> int:
+        return self.submit(self._update_tasks, [replace(task) for task in tasks])
+
+    def delete_tasks(self, task_ids: Iterable[int]) -> int:
+        return self.submit(self._delete_tasks, list(task_ids))
+
+    def set_status_many(self, task_ids: Iterable[int], status: Status) -> int:
+        return self.submit(self._set_status_many, list(task_ids), status)
+
+    def complete_occurrences(self, items: Iterable[Tuple[int, Optional[int]]]) -> int:
+        """Завершение текущих повторений серий: items — (id серии, временный id повторения).
+
+        Результат команды — [(временный id, id в базе)] по найденным сериям;
+        у закончившихся серий id в базе — None.
+        """
+        return self.submit(self._complete_occurrences, list(items))
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """Запись оставшихся команд и остановка потока.
+
+        False — поток не успел записать очередь за timeout секунд; повторный
+        вызов продолжает ожидание. Без timeout ждет записи всех команд.
+        """
+        if not self._stopping:
+            self._stopping = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _resolve(self, task_id: int) -> int:
+        return self._real_ids.get(task_id, task_id)
+
+    def _add_task(self, task: Task) -> int:
+        task_id = self.db.add_task(task)
+        if task.id is not None and task.id < 0:
+            self._real_ids[task.id] = task_id
+        return task_id
+
+    def _update_tasks(self, tasks: List[Task]) -> int:
+        for task in tasks:
+            task.id = self._resolve(task.id)
+        if len(tasks) == 1:
+            return int(self.db.update_task(tasks[0]))
+        return self.db.update_tasks(tasks)
+
+    def _delete_tasks(self, task_ids: List[int]) -> int:
+        return self.db.delete_tasks([self._resolve(task_id) for task_id in task_ids])
+
+    def _set_status_many(self, task_ids: List[int], status: Status) -> int:
+        return self.db.set_status_many([self._resolve(task_id) for task_id in task_ids], status)
+
+    def _complete_occurrences(self, items: List[Tuple[int, Optional[int]]]) -> list:
+        task_ids = [self._resolve(task_id) for task_id, _ in items]
+        created = self.db.complete_occurrences(task_ids)
+        results = []
+        for task_id, (_, temp_id) in zip(task_ids, items):
+            if task_id not in created:
+                continue
+            real_id = created[task_id]
+            if temp_id is not None and real_id is not None:
+                self._real_ids[temp_id] = real_id
+            results.append((temp_id, real_id))
+        return results
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # Окно группового коммита: команды, пришедшие следом, попадут в ту же транзакцию
+            deadline = time.monotonic() + self.group_window
+            while len(batch) < self.MAX_GROUP_SIZE:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._execute(batch)
+
+    def _execute(self, batch: list):
+        real_ids = dict(self._real_ids)
+        try:
+            with self.db.transaction():
+                results = [func(*args) for _, func, args in batch]
+        except Exception as e:
+            self._real_ids = real_ids
+            if len(batch) == 1:
+                self._report_error(batch[0][0], e)
+                return
+            # Ошибка одной команды не должна отменять остальные: повтор по одной
+            for item in batch:
+                self._execute([item])
+            return
+        for (ticket, _, _), result in zip(batch, results):
+            self.finished.emit(ticket, result)
+
+    def _report_error(self, ticket: int, error: Exception):
+        logger.error(f"Ошибка фоновой записи: {error}")
+        self.failed.emit(ticket, str(error))